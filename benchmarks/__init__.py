@@ -0,0 +1,7 @@
+"""
+Reproducible benchmarks for the core API endpoints.
+
+``python manage.py bench`` seeds a synthetic shop into a throwaway test database and
+times each endpoint in ``benchmarks.runner.ENDPOINTS`` through the DRF test client,
+writing wall time, query count and peak memory to JSON for comparison between commits.
+"""
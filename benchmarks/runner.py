@@ -0,0 +1,107 @@
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+import django
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .seed import seed_shop
+
+# (name, HTTP method, url name, query params or JSON body)
+ENDPOINTS = [
+    ("appointments", "get", "appointment-list", {}),
+    ("appointments_archived", "get", "appointment-list", {"archived": "true"}),
+    ("appointments_overview", "get", "appointment-overview", {}),
+    ("metrics_last_30_days", "get", "key-metrics", {"range": "last_30_days"}),
+    ("metrics_all_time", "get", "key-metrics", {}),
+    ("billing_summary", "post", "billing-summary", {"fee_type": "percentage", "fee_value": "10"}),
+    ("recent_activity", "get", "recent-activity", {}),
+]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(client, method, url, data, repeat):
+    """
+    Request ``url`` once under tracemalloc for the query count and peak memory, then
+    ``repeat`` more times untraced for wall time (tracing would inflate the timings).
+    """
+    def request():
+        if method == "post":
+            return client.post(url, data, format="json")
+        return client.get(url, data)
+
+    # The captured-query log is a bounded deque; start it empty so the slice below is exact
+    reset_queries()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        # Read now: the next request's request_started signal clears the log
+        query_count = len(queries.captured_queries)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "status": response.status_code,
+        "queries": query_count,
+        "peak_memory_kb": round(peak / 1024, 1),
+        "wall_ms": {
+            "min": round(min(timings), 3),
+            "median": round(statistics.median(timings), 3),
+            "mean": round(statistics.fmean(timings), 3),
+            "max": round(max(timings), 3),
+        },
+    }
+
+
+def run_benchmarks(config, repeat=5, endpoints=None):
+    """
+    Seed the current database from ``config`` (a ShopConfig) and measure ``endpoints``
+    (default ENDPOINTS) as the shop admin. Returns a JSON-serializable report.
+    """
+    seeding_started = time.perf_counter()
+    admin = seed_shop(config)
+    seed_seconds = time.perf_counter() - seeding_started
+
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    results = {
+        name: measure(client, method, reverse(url_name), data, repeat)
+        for name, method, url_name, data in (endpoints or ENDPOINTS)
+    }
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "database": connection.vendor,
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "seed_seconds": round(seed_seconds, 3),
+            "shop": asdict(config),
+        },
+        "results": results,
+    }
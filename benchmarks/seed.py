@@ -0,0 +1,100 @@
+import random
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from core.models import User, ClientProfile, Service, Appointment, Notifications
+from core.rollups import rebuild_daily_revenue
+
+# Hourly one-hour slots per artist per day, 10:00 to 18:00
+SLOT_HOURS = range(10, 18)
+SEED_BATCH_SIZE = 2000
+
+
+@dataclass
+class ShopConfig:
+    artists: int = 10
+    clients: int = 2000
+    appointments: int = 50000
+    years: int = 3
+    notifications: int = 5000
+    seed: int = 1
+
+
+def _status_for(day, today, rng):
+    if day >= today:
+        return rng.choices(["confirmed", "pending"], weights=[9, 1])[0]
+    return rng.choices(["completed", "canceled", "no_show", "confirmed"], weights=[75, 12, 5, 8])[0]
+
+
+def seed_shop(config, today=None):
+    """
+    Fill the current database with a synthetic shop: an admin, ``config.artists`` artists,
+    ``config.clients`` clients, ``config.appointments`` non-overlapping appointments spread
+    over ``config.years`` years ending 30 days after ``today``, and notifications on a sample
+    of them. The same config and ``today`` always produce the same rows.
+    Returns the admin user.
+    """
+    rng = random.Random(config.seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=365 * config.years - 30)
+    days = (today + timedelta(days=30) - first_day).days
+    slots = config.artists * days * len(SLOT_HOURS)
+    if config.appointments > slots:
+        raise ValueError(f"At most {slots} appointments fit {config.artists} artist(s) over {config.years} year(s).")
+
+    admin = User.objects.create(username="bench-admin", role="admin", is_staff=True)
+    artists = User.objects.bulk_create([
+        User(username=f"bench-artist-{i}", first_name="Artist", last_name=str(i), role="employee")
+        for i in range(config.artists)
+    ])
+    services = list(Service.objects.all()) or Service.objects.bulk_create([
+        Service(name=name, price=Decimal(100 * (i + 1))) for i, (name, _label) in enumerate(Service.SERVICE_CHOICES)
+    ])
+    clients = ClientProfile.objects.bulk_create(
+        [
+            ClientProfile(
+                first_name=f"Client{i}", last_name="Bench", email=f"client{i}@bench.example",
+                phone=f"555{i:07d}", employee=rng.choice(artists),
+            )
+            for i in range(config.clients)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+
+    appointments = []
+    for slot in sorted(rng.sample(range(slots), config.appointments)):
+        artist_index, rest = divmod(slot, days * len(SLOT_HOURS))
+        day_index, hour_index = divmod(rest, len(SLOT_HOURS))
+        day = first_day + timedelta(days=day_index)
+        hour = SLOT_HOURS[hour_index]
+        appointments.append(Appointment(
+            client=rng.choice(clients),
+            employee=artists[artist_index],
+            service=rng.choice(services),
+            date=day,
+            time=time(hour, 0),
+            end_time=time(hour + 1, 0),
+            price=Decimal(rng.randrange(80, 600)),
+            status=_status_for(day, today, rng),
+        ))
+    Appointment.objects.bulk_create(appointments, batch_size=SEED_BATCH_SIZE)
+
+    sample = rng.sample(appointments, min(config.notifications, len(appointments)))
+    Notifications.objects.bulk_create(
+        [
+            Notifications(
+                employee=appointment.employee,
+                appointment=appointment,
+                action=rng.choice(["created", "updated", "no_show"]),
+                status=rng.choices(["pending", "approved", "denied"], weights=[2, 6, 2])[0],
+                changes={"date": str(appointment.date), "time": str(appointment.time)},
+            )
+            for appointment in sample
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+
+    # bulk_create sends no signals, so build the revenue rollup in one pass
+    rebuild_daily_revenue()
+    return admin
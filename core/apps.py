@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if settings.NOTIFICATION_PRUNE_INTERVAL:
+            from .scheduler import start_notification_pruner
+            start_notification_pruner(settings.NOTIFICATION_PRUNE_INTERVAL)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+from itertools import groupby
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def free_intervals(bookings, open_minute, close_minute, duration):
+    """
+    Sweep a day's bookings, sorted by start, and yield the (start, end) gaps in
+    minutes-of-day between ``open_minute`` and ``close_minute`` that fit ``duration``.
+    Overlapping or back-to-back bookings are merged as the sweep advances; bookings are
+    clamped to opening hours so one running past closing never extends a gap beyond it.
+    """
+    cursor = open_minute
+    for start, end in bookings:
+        start = min(max(start, open_minute), close_minute)
+        end = min(max(end, open_minute), close_minute)
+        if start - cursor >= duration:
+            yield cursor, start
+        cursor = max(cursor, end)
+        if cursor >= close_minute:
+            return
+    if close_minute - cursor >= duration:
+        yield cursor, close_minute
+
+
+def find_availability(bookings, employee_ids, start_date, end_date, duration, opening, closing, earliest=None):
+    """
+    Compute free slots per employee per day.
+
+    ``bookings`` is an iterable of (employee_id, date, time, end_time) rows ordered by
+    employee, date and time. ``earliest`` is an optional (date, time) before which nothing
+    is offered, e.g. the current time for today's slots.
+
+    Returns {employee_id: [{"date", "start", "end"}, ...]}.
+    """
+    open_minute, close_minute = _minutes(opening), _minutes(closing)
+    by_day = {
+        key: [(_minutes(start), _minutes(end)) for _, _, start, end in rows]
+        for key, rows in groupby(bookings, key=lambda row: (row[0], row[1]))
+    }
+
+    days = []
+    day = start_date
+    while day <= end_date:
+        days.append(day)
+        day += timedelta(days=1)
+
+    availability = {}
+    for employee_id in employee_ids:
+        slots = []
+        for day in days:
+            day_open = open_minute
+            if earliest is not None:
+                if day < earliest[0]:
+                    continue
+                if day == earliest[0]:
+                    day_open = max(open_minute, _minutes(earliest[1]))
+            for start, end in free_intervals(by_day.get((employee_id, day), ()), day_open, close_minute, duration):
+                slots.append({"date": day.isoformat(), "start": _clock(start), "end": _clock(end)})
+        availability[employee_id] = slots
+    return availability
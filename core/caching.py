@@ -0,0 +1,78 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.core.cache import cache
+from django.utils.timezone import now
+
+SERVICE_CATALOG_KEY = "core:service_catalog"
+SERVICE_CATALOG_VERSION_KEY = "core:service_catalog:version"
+
+# Seconds a process serves its local copy without asking the shared cache whether
+# another worker changed it; bounds how stale other workers can be after a write
+LOCAL_TTL = 5
+
+# Process-local copy of the last catalog entry, reused while its version is current
+_local = {}
+
+
+def make_etag(payload):
+    """Strong ETag for a JSON-serializable payload."""
+    digest = hashlib.md5(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def shared_version(key):
+    """The version token stored under ``key`` in the shared cache, created on first use."""
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # add() so concurrent workers agree on the first version
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key)
+    return version
+
+
+def get_service_catalog():
+    """
+    Return the serialized service list as {"version", "data", "etag", "last_modified"}.
+
+    Lookup order is the process-local copy, then the shared Django cache, then the
+    database. The local copy is served without any cache or database round trip for
+    LOCAL_TTL seconds after it was last checked; after that, and for the other layers,
+    it is only trusted if it matches the version key in the shared cache, which
+    invalidate_service_catalog() rotates after every committed Service write. The
+    writing process drops its copy at once; other workers see the write within LOCAL_TTL.
+    """
+    from .models import Service
+    from .serializers import ServiceSerializer
+
+    entry = _local.get("catalog")
+    if entry is not None and time.monotonic() < _local["checked"] + LOCAL_TTL:
+        return entry
+
+    version = shared_version(SERVICE_CATALOG_VERSION_KEY)
+    if entry is not None and entry["version"] == version:
+        _local["checked"] = time.monotonic()
+        return entry
+
+    entry = cache.get(SERVICE_CATALOG_KEY)
+    if entry is None or entry["version"] != version:
+        data = [dict(row) for row in ServiceSerializer(Service.objects.order_by("id"), many=True).data]
+        entry = {
+            "version": version,
+            "data": data,
+            "etag": make_etag(data),
+            "last_modified": now().replace(microsecond=0),
+        }
+        cache.set(SERVICE_CATALOG_KEY, entry, timeout=None)
+
+    _local.update(catalog=entry, checked=time.monotonic())
+    return entry
+
+
+def invalidate_service_catalog():
+    _local.clear()
+    cache.set(SERVICE_CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    cache.delete(SERVICE_CATALOG_KEY)
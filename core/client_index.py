@@ -0,0 +1,193 @@
+import logging
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils.timezone import now
+
+from .caching import LOCAL_TTL, shared_version
+
+logger = logging.getLogger(__name__)
+
+# Rotated by every client save; other processes then re-read only the rows saved since their last sync
+CLIENT_INDEX_VERSION_KEY = "core:client_index:version"
+# Rotated by deletes, which a delta sync cannot see, and by invalidate_client_index(): full reload
+CLIENT_INDEX_GENERATION_KEY = "core:client_index:generation"
+CLIENT_SEARCH_LIMIT = 10
+CLIENT_FIELDS = ("id", "first_name", "last_name", "email", "phone")
+# A delta sync re-reads rows saved this long before the previous one, for transactions that commit late
+SYNC_OVERLAP = timedelta(seconds=30)
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _normalize(value):
+    return (value or "").strip().casefold()
+
+
+def _keys(client):
+    """Index keys for a compact (id, first_name, last_name, email, phone) tuple."""
+    client_id, first_name, last_name, email, phone = client
+    keys = {_normalize(first_name), _normalize(last_name), _normalize(email)}
+    digits = _NON_DIGITS.sub("", phone or "")
+    if digits:
+        keys.add(digits)
+    return [(key, client_id) for key in keys if key]
+
+
+class ClientPrefixIndex:
+    """
+    Per-process prefix index over client first name, last name, email and phone digits.
+
+    Entries are (key, client_id) pairs in one sorted list, so all keys starting with a
+    prefix sit in a contiguous run found with bisect. Clients are kept as compact tuples
+    rather than model instances. Every method takes the lock; searches are microseconds.
+
+    ``version``, ``generation`` and ``synced_at`` record the shared keys and the time of
+    the last sync with the database; ``checked`` is when they were last compared.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+        self._clients = {}
+        self.version = self.generation = self.synced_at = None
+        self.checked = float("-inf")
+
+    def load(self, clients):
+        entries = sorted(entry for client in clients for entry in _keys(client))
+        with self._lock:
+            self._clients = {client[0]: client for client in clients}
+            self._entries = entries
+
+    def upsert(self, client):
+        with self._lock:
+            self._remove(client[0])
+            self._clients[client[0]] = client
+            for entry in _keys(client):
+                insort(self._entries, entry)
+
+    def remove(self, client_id):
+        with self._lock:
+            self._remove(client_id)
+
+    def _remove(self, client_id):
+        previous = self._clients.pop(client_id, None)
+        if previous is None:
+            return
+        for entry in _keys(previous):
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def _matching_ids(self, prefix, limit=None):
+        """Client ids with a key starting with ``prefix``, in key order, stopping at ``limit``."""
+        ids = {}
+        position = bisect_left(self._entries, (prefix,))
+        while position < len(self._entries):
+            key, client_id = self._entries[position]
+            if not key.startswith(prefix):
+                break
+            ids[client_id] = None
+            if limit is not None and len(ids) >= limit:
+                break
+            position += 1
+        return ids
+
+    def search(self, query, limit=CLIENT_SEARCH_LIMIT):
+        """
+        Clients matching every whitespace-separated term of ``query`` by prefix, as
+        (id, first_name, last_name, email, phone) tuples. A single term returns hits in
+        key order; several terms are intersected and ordered by name.
+        """
+        terms = []
+        for term in _normalize(query).split():
+            digits = _NON_DIGITS.sub("", term)
+            # "555-01" should match phone digits; "jo" or "jo@x" must not be reduced to digits
+            terms.append(digits if digits and not re.search(r"[^\d\s()+.-]", term) else term)
+        if not terms:
+            return []
+
+        with self._lock:
+            if len(terms) == 1:
+                ids = list(self._matching_ids(terms[0], limit))
+                return [self._clients[client_id] for client_id in ids]
+
+            matches = None
+            for term in sorted(terms, key=len, reverse=True):
+                ids = self._matching_ids(term).keys()
+                matches = set(ids) if matches is None else matches & ids
+                if not matches:
+                    return []
+            clients = sorted(
+                (self._clients[client_id] for client_id in matches),
+                key=lambda client: (_normalize(client[2]), _normalize(client[1]), client[0]),
+            )
+            return clients[:limit]
+
+
+_index = ClientPrefixIndex()
+
+
+def _client_row(client):
+    return tuple(getattr(client, field) for field in CLIENT_FIELDS)
+
+
+def get_client_index():
+    """
+    Return the process-local index, synced with the database at most every LOCAL_TTL
+    seconds; in between, searches run no queries at all. A sync compares the shared keys
+    with the ones this process last read: a new generation reloads every client, a new
+    version re-reads only the clients saved since the previous sync (ClientProfile.updated_at).
+
+    The keys are read before the database, and this process never adopts a key it did
+    not read, so a write signalled at any point is picked up by the next sync at the latest.
+    """
+    from .models import ClientProfile
+
+    if _index.generation is not None and time.monotonic() < _index.checked + LOCAL_TTL:
+        return _index
+
+    started = now()
+    generation = shared_version(CLIENT_INDEX_GENERATION_KEY)
+    version = shared_version(CLIENT_INDEX_VERSION_KEY)
+    if generation != _index.generation:
+        _index.load(list(ClientProfile.objects.values_list(*CLIENT_FIELDS)))
+    elif version != _index.version:
+        changed = ClientProfile.objects.filter(updated_at__gte=_index.synced_at - SYNC_OVERLAP)
+        for row in changed.values_list(*CLIENT_FIELDS):
+            _index.upsert(row)
+    _index.version, _index.generation, _index.synced_at = version, generation, started
+    _index.checked = time.monotonic()
+    return _index
+
+
+def warm_client_index():
+    """Build the index at server start so the first search does not pay for it."""
+    try:
+        get_client_index()
+    except DatabaseError:
+        logger.warning("Client search index not warmed; it will be built on first search.", exc_info=True)
+
+
+def clients_saved(clients):
+    """Apply saved clients to this process's index and tell other processes to re-read them."""
+    for client in clients:
+        _index.upsert(_client_row(client))
+    cache.set(CLIENT_INDEX_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def client_deleted(client_id):
+    """Drop a deleted client here; other processes reload, since deletes leave no row to sync."""
+    _index.remove(client_id)
+    cache.set(CLIENT_INDEX_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def invalidate_client_index():
+    """Force every process to rebuild its index from the database on its next search."""
+    _index.generation = None
+    cache.set(CLIENT_INDEX_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """A subscriber's queue, bound to the event loop that is waiting on it."""
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class BaseBroker:
+    """
+    Pub/sub interface used to push notification events to SSE clients.
+
+    publish() is called from synchronous code (request threads, signal handlers);
+    subscribe() and unsubscribe() are called from the async stream view.
+    """
+    def publish(self, message):
+        raise NotImplementedError
+
+    def has_subscribers(self):
+        """Whether anyone may be listening. Brokers that cannot tell return True."""
+        return True
+
+    def subscribe(self):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """
+    Fans messages out to subscribers in this process only. Suitable for a single
+    ASGI worker process and for tests: a write handled by another worker process is
+    never seen here, so multi-worker deployments need a BaseBroker subclass shared
+    between workers (see NOTIFICATION_BROKER in settings).
+    """
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down without unsubscribing
+                self.unsubscribe(subscription)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscriptions)
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+_brokers = {}
+
+
+def get_broker():
+    """Return the process-wide broker configured by NOTIFICATION_BROKER."""
+    path = settings.NOTIFICATION_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def publish_notifications(ids, event):
+    """
+    After the current transaction commits, publish ``event`` ("created", "updated")
+    with the serialized notifications ``ids``. Skipped entirely while nobody is
+    subscribed; otherwise one for_feed() query serializes them all.
+    """
+    def publish():
+        broker = get_broker()
+        if not broker.has_subscribers():
+            return
+        from .models import Notifications
+        from .serializers import NotificationSerializer
+
+        for notification in Notifications.objects.for_feed().filter(pk__in=ids).order_by("id"):
+            broker.publish({"event": event, "notification": NotificationSerializer(notification).data})
+
+    transaction.on_commit(publish)
+
+
+def publish_removal(event, payload):
+    """
+    After commit, publish a removal: ``deleted`` with {"id", "employee"} for one
+    notification, or ``pruned`` with {"before"} when everything older was deleted.
+    """
+    def publish():
+        broker = get_broker()
+        if broker.has_subscribers():
+            broker.publish({"event": event, "notification": payload})
+
+    transaction.on_commit(publish)
@@ -0,0 +1,94 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Value
+
+from .models import Appointment, Notifications
+
+# Text search configuration used by the PostgreSQL triggers (migration 0024)
+SEARCH_CONFIG = "english"
+SEARCH_KINDS = ("appointment", "notification")
+
+# SQLite fallback: one FTS5 table per model, rowid = primary key, so the triggers
+# update a row with a rowid lookup. Installed idempotently after every migrate because
+# SQLite migrations that rebuild a table drop its triggers.
+SQLITE_FTS_TABLES = {
+    "appointment": ("core_appointment_fts", "core_appointment", "coalesce(NEW.notes, '')"),
+    "notification": (
+        "core_notifications_fts",
+        "core_notifications",
+        "coalesce((SELECT group_concat(value, ' ') FROM json_tree(NEW.changes) WHERE type = 'text'), '')",
+    ),
+}
+
+
+def install_sqlite_fts(using_connection):
+    """Create the FTS5 tables and sync triggers if missing, backfilling new tables."""
+    with using_connection.cursor() as cursor:
+        for fts_table, table, body in SQLITE_FTS_TABLES.values():
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts_table])
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+                    f"employee_id UNINDEXED, body, tokenize = 'porter unicode61')"
+                )
+                backfill = body.replace("NEW.", "")
+                cursor.execute(f"INSERT INTO {fts_table} (rowid, employee_id, body) SELECT id, employee_id, {backfill} FROM {table}")
+
+            insert = f"INSERT INTO {fts_table} (rowid, employee_id, body) VALUES (NEW.id, NEW.employee_id, {body});"
+            delete = f"DELETE FROM {fts_table} WHERE rowid = OLD.id;"
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN {insert} END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN {delete} END")
+
+
+def _fts5_query(query):
+    """Quote each word so user input is matched as terms (all required), never as FTS5 syntax."""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def _search_sqlite(query, kinds, employee, offset, limit):
+    match = _fts5_query(query)
+    if not match:
+        return []
+    selects, params = [], []
+    for kind in kinds:
+        fts_table = SQLITE_FTS_TABLES[kind][0]
+        # bm25() is lower for better matches
+        sql = f"SELECT %s, rowid, -bm25({fts_table}) FROM {fts_table} WHERE {fts_table} MATCH %s"
+        params += [kind, match]
+        if employee is not None:
+            sql += " AND employee_id = %s"
+            params.append(employee.pk)
+        selects.append(sql)
+    sql = " UNION ALL ".join(selects) + " ORDER BY 3 DESC, 1, 2 LIMIT %s OFFSET %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit, offset])
+        return [(kind, object_id, rank) for kind, object_id, rank in cursor.fetchall()]
+
+
+def _search_postgres(query, kinds, employee, offset, limit):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    models = {"appointment": Appointment, "notification": Notifications}
+    ranked = None
+    for kind in kinds:
+        queryset = models[kind].objects.filter(search_vector=search_query)
+        if employee is not None:
+            queryset = queryset.filter(employee=employee)
+        queryset = queryset.annotate(
+            kind=Value(kind), rank=SearchRank(F("search_vector"), search_query, output_field=FloatField())
+        ).values_list("kind", "id", "rank")
+        ranked = queryset if ranked is None else ranked.union(queryset, all=True)
+    return list(ranked.order_by("-rank", "kind", "id")[offset:offset + limit])
+
+
+def search(query, kinds=SEARCH_KINDS, employee=None, offset=0, limit=20):
+    """
+    Rank appointments (by notes) and notifications (by the text in changes) against
+    ``query``. Returns up to ``limit`` (kind, id, rank) tuples starting at ``offset``,
+    best first; ``employee`` restricts results to that employee's rows.
+    """
+    if connection.vendor == "postgresql":
+        return _search_postgres(query, kinds, employee, offset, limit)
+    return _search_sqlite(query, kinds, employee, offset, limit)
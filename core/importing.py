@@ -0,0 +1,163 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .events import publish_notifications
+from .models import Appointment, ClientProfile, Notifications, Service, User
+from .recurrence import booked_slots, overlaps
+from .rollups import sync_daily_revenue
+from .serializers import AppointmentImportSerializer
+
+IMPORT_BATCH_SIZE = 1000
+
+
+def _import_batch(rows, user, services):
+    """
+    Resolve and insert one batch of validated (index, data) rows.
+    Returns (created_count, {index: errors}).
+    """
+    errors = {}
+
+    employees = User.objects.in_bulk({data["employee"] for _, data in rows})
+    clients_by_id = ClientProfile.objects.in_bulk({data["client_id"] for _, data in rows if "client_id" in data})
+    emails = {data["client_email"] for _, data in rows if "client_email" in data}
+    clients_by_email = {client.email: client for client in ClientProfile.objects.filter(email__in=emails)}
+
+    # New clients, first row wins for each unknown email
+    new_clients = {}
+    for index, data in rows:
+        email = data.get("client_email")
+        if email is None or email in clients_by_email or email in new_clients:
+            continue
+        if not all(data.get(field) for field in ("client_first_name", "client_last_name", "client_phone")):
+            continue
+        new_clients[email] = ClientProfile(
+            first_name=data["client_first_name"],
+            last_name=data["client_last_name"],
+            email=email,
+            phone=data["client_phone"],
+            employee=employees.get(data["employee"]),
+        )
+
+    # Active bookings already on the books (and series occurrences) for the employees and dates in this batch
+    active = [(i, d) for i, d in rows if d["status"] not in Appointment.INACTIVE_STATUSES]
+    booked = defaultdict(list)
+    if active:
+        booked = booked_slots(
+            {d["employee"] for _, d in active}, min(d["date"] for _, d in active), max(d["date"] for _, d in active)
+        )
+
+    pending = []
+    for index, data in rows:
+        employee = employees.get(data["employee"])
+        if employee is None:
+            errors[index] = {"employee": ["Unknown employee."]}
+            continue
+        if data["service"] not in services:
+            errors[index] = {"service": ["Unknown service."]}
+            continue
+        if "client_id" in data:
+            client = clients_by_id.get(data["client_id"])
+            if client is None:
+                errors[index] = {"client_id": ["Unknown client."]}
+                continue
+        else:
+            client = clients_by_email.get(data["client_email"]) or new_clients.get(data["client_email"])
+            if client is None:
+                errors[index] = {"client": ["New clients need client_first_name, client_last_name and client_phone."]}
+                continue
+
+        if data["status"] not in Appointment.INACTIVE_STATUSES:
+            slot = booked[(employee.id, data["date"])]
+            if overlaps(slot, data["time"], data["end_time"]):
+                errors[index] = {"time": ["This employee already has an appointment during this time."]}
+                continue
+            slot.append((None, data["time"], data["end_time"]))
+
+        pending.append((index, client, Appointment(
+            employee=employee,
+            service=services[data["service"]],
+            date=data["date"],
+            time=data["time"],
+            end_time=data["end_time"],
+            price=data["price"],
+            status=data["status"],
+            requires_approval=data["requires_approval"],
+            notes=data.get("notes"),
+        )))
+
+    if not pending:
+        return 0, errors
+
+    try:
+        with transaction.atomic():
+            used_emails = {client.email for _, client, _ in pending if client.pk is None}
+            # INSERT ... ON CONFLICT, so a client created concurrently by a booking is reused, not a 500
+            stored_clients = ClientProfile.objects.upsert_by_email(
+                [c for email, c in new_clients.items() if email in used_emails]
+            )
+            appointments = []
+            for _, client, appointment in pending:
+                appointment.client = stored_clients.get(client.email, client) if client.pk is None else client
+                appointments.append(appointment)
+            Appointment.objects.bulk_create(appointments)
+            sync_daily_revenue(appointments)
+
+            # Same rule as AppointmentListView.perform_create: only non-admin bookings notify
+            if user.role != "admin":
+                created = Notifications.objects.bulk_create([
+                    Notifications(
+                        employee=user,
+                        appointment=appointment,
+                        action="created",
+                        changes={
+                            "date": str(appointment.date),
+                            "time": str(appointment.time),
+                            "end_time": str(appointment.end_time),
+                            "price": str(appointment.price),
+                            "service": appointment.service.name,
+                            "notes": appointment.notes,
+                        },
+                    )
+                    for appointment in appointments
+                ])
+                # bulk_create sends no post_save, so push to the notification stream here
+                publish_notifications([n.pk for n in created], "created")
+    except IntegrityError as exc:
+        if Appointment.NO_OVERLAP_CONSTRAINT not in str(exc):
+            raise
+        # PostgreSQL's exclusion constraint caught a booking made after the check above;
+        # the whole batch was rolled back, so report every row in it
+        for index, _, _ in pending:
+            errors[index] = {"time": ["This employee already has an appointment during this time."]}
+        return 0, errors
+
+    return len(appointments), errors
+
+
+def import_appointments(rows, user, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate and insert appointment rows (AppointmentImportSerializer format) on behalf of ``user``.
+
+    Each batch costs a fixed handful of queries: employees, clients by id and by email
+    (one IN query each), existing bookings and recurring series for the overlap check, an
+    INSERT ... ON CONFLICT upsert for new clients, then bulk_create for appointments and notifications.
+
+    Returns {"created": int, "errors": [{"row": index, "errors": {...}}, ...]}.
+    """
+    services = Service.objects.in_bulk(field_name="name")
+    created = 0
+    errors = []
+
+    for offset in range(0, len(rows), batch_size):
+        serializer = AppointmentImportSerializer(data=rows[offset:offset + batch_size], many=True)
+        serializer.is_valid(raise_exception=True)
+        row_errors = {offset + index: detail for index, detail in serializer.row_errors.items()}
+        valid = [(offset + index, data) for index, data in serializer.validated_data]
+
+        batch_created, batch_errors = _import_batch(valid, user, services) if valid else (0, {})
+        created += batch_created
+        row_errors.update(batch_errors)
+        errors.extend({"row": index, "errors": row_errors[index]} for index in sorted(row_errors))
+
+    return {"created": created, "errors": errors}
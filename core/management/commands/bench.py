@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from benchmarks.runner import run_benchmarks
+from benchmarks.seed import ShopConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic shop into a throwaway test database and time the core API endpoints. "
+        "Writes wall time, query count and peak memory per endpoint as JSON."
+    )
+
+    def add_arguments(self, parser):
+        defaults = ShopConfig()
+        parser.add_argument("--artists", type=int, default=defaults.artists, help="Number of artists.")
+        parser.add_argument("--clients", type=int, default=defaults.clients, help="Number of clients.")
+        parser.add_argument("--appointments", type=int, default=defaults.appointments, help="Number of appointments.")
+        parser.add_argument("--years", type=int, default=defaults.years, help="Years of history to spread them over.")
+        parser.add_argument("--notifications", type=int, default=defaults.notifications, help="Number of notifications.")
+        parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed for the synthetic data.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint.")
+        parser.add_argument("--output", help="File to write the JSON report to (default: stdout).")
+
+    def handle(self, *args, **options):
+        config = ShopConfig(
+            artists=options["artists"],
+            clients=options["clients"],
+            appointments=options["appointments"],
+            years=options["years"],
+            notifications=options["notifications"],
+            seed=options["seed"],
+        )
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        # Never seed into the configured database: build a test database like the test runner does
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = run_benchmarks(config, repeat=options["repeat"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(payload + "\n")
+            self.stdout.write(f"Wrote benchmark report to {options['output']}.")
+        else:
+            self.stdout.write(payload)
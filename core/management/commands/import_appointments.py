@@ -0,0 +1,39 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import IMPORT_BATCH_SIZE, import_appointments
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import appointments from a CSV file whose columns match AppointmentImportSerializer "
+        "(client_id or client_email/client_first_name/client_last_name/client_phone, employee, "
+        "service, date, time, end_time, price, status, requires_approval, notes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import.")
+        parser.add_argument("--user", required=True, help="Username the appointments are created by.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows per batch.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+
+        try:
+            with open(options["path"], newline="", encoding="utf-8-sig") as handle:
+                # Empty cells mean "not provided" so optional columns can be left blank
+                rows = [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(handle)]
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        report = import_appointments(rows, user, batch_size=options["batch_size"])
+
+        for error in report["errors"]:
+            # +2: header line, and CSV lines are 1-based
+            self.stderr.write(f"Line {error['row'] + 2}: {error['errors']}")
+        self.stdout.write(f"Imported {report['created']} appointment(s); {len(report['errors'])} row(s) rejected.")
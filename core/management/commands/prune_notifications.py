@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import AppointmentTombstone, Notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete notifications older than the retention window, and expired appointment "
+        "tombstones, in bounded batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.NOTIFICATION_RETENTION_DAYS,
+            help="Retention window in days (default: NOTIFICATION_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows deleted per statement.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = Notifications.objects.prune_expired(
+            retention_days=options["days"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(f"Deleted {deleted} notification(s) older than {options['days']} days.")
+        tombstones = AppointmentTombstone.objects.prune_expired(batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {tombstones} expired appointment tombstone(s).")
@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core.rollups import ROLLUP_BATCH_SIZE, rebuild_daily_revenue
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailyRevenue rollup from the appointments table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start",
+            type=date.fromisoformat,
+            help="First date to rebuild (YYYY-MM-DD); defaults to the earliest appointment.",
+        )
+        parser.add_argument(
+            "--to",
+            dest="end",
+            type=date.fromisoformat,
+            help="Last date to rebuild (YYYY-MM-DD); defaults to the latest appointment.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ROLLUP_BATCH_SIZE,
+            help="Rollup rows inserted per statement.",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_revenue(options["start"], options["end"], batch_size=options["batch_size"])
+        self.stdout.write(f"Wrote {written} daily revenue row(s).")
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_alter_appointment_date_alter_appointment_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['date', 'time', 'id'], name='core_appt_date_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(fields=['timestamp', 'id'], name='core_notif_timestamp_id_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+# Two active appointments for the same employee may not overlap in time.
+# tsrange(date + time, date + end_time) is half-open, so back-to-back bookings are allowed.
+ADD_CONSTRAINT = """
+ALTER TABLE core_appointment ADD CONSTRAINT core_appt_no_overlap EXCLUDE USING gist (
+    employee_id WITH =,
+    tsrange(date + time, date + end_time, '[)') WITH &&
+) WHERE (status NOT IN ('canceled', 'no_show'))
+"""
+DROP_CONSTRAINT = "ALTER TABLE core_appointment DROP CONSTRAINT IF EXISTS core_appt_no_overlap"
+
+
+def add_constraint(apps, schema_editor):
+    # Exclusion constraints are PostgreSQL-only; other backends rely on the serializer check.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(ADD_CONSTRAINT)
+
+
+def drop_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(add_constraint, drop_constraint),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill(apps, schema_editor):
+    # Same grouping as core.rollups.rebuild_daily_revenue, against the historical models
+    Appointment = apps.get_model('core', 'Appointment')
+    DailyRevenue = apps.get_model('core', 'DailyRevenue')
+    totals = (
+        Appointment.objects.filter(status='completed')
+        .values_list('date', 'employee', 'service')
+        .annotate(revenue=Sum('price'), appointments=Count('id'))
+        .order_by()
+    )
+    DailyRevenue.objects.bulk_create(
+        (
+            DailyRevenue(date=day, employee_id=employee, service_id=service, revenue=revenue, appointments=count)
+            for day, employee, service, revenue, count in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_recurrencerule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('appointments', models.PositiveIntegerField()),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.service')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'employee', 'service'), name='core_dailyrevenue_unique')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
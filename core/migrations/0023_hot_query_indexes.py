@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['employee', 'date', 'time'], name='core_appt_emp_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'completed')), fields=['date', 'client'], name='core_appt_completed_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notifications',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['appointment', 'employee', 'action'], name='core_notif_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:55
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# PostgreSQL keeps search_vector current with BEFORE triggers, so every write path
+# (save, bulk_create, bulk_update, QuerySet.update) is covered. SQLite has no tsvector;
+# core.fulltext installs FTS5 tables and triggers there after each migrate instead.
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION core_appointment_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := to_tsvector('english', coalesce(NEW.notes, ''));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_vector
+    BEFORE INSERT OR UPDATE OF notes, search_vector ON core_appointment
+    FOR EACH ROW EXECUTE FUNCTION core_appointment_search_vector()
+    """,
+    "UPDATE core_appointment SET search_vector = to_tsvector('english', coalesce(notes, ''))",
+    "CREATE INDEX core_appt_search_idx ON core_appointment USING gin (search_vector)",
+    """
+    CREATE FUNCTION core_notifications_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := jsonb_to_tsvector('english', coalesce(NEW.changes, '{}'::jsonb), '["string"]');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_notifications_search_vector
+    BEFORE INSERT OR UPDATE OF changes, search_vector ON core_notifications
+    FOR EACH ROW EXECUTE FUNCTION core_notifications_search_vector()
+    """,
+    "UPDATE core_notifications SET search_vector = jsonb_to_tsvector('english', coalesce(changes, '{}'::jsonb), '[\"string\"]')",
+    "CREATE INDEX core_notif_search_idx ON core_notifications USING gin (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS core_notif_search_idx",
+    "DROP TRIGGER IF EXISTS core_notifications_search_vector ON core_notifications",
+    "DROP FUNCTION IF EXISTS core_notifications_search_vector()",
+    "DROP INDEX IF EXISTS core_appt_search_idx",
+    "DROP TRIGGER IF EXISTS core_appointment_search_vector ON core_appointment",
+    "DROP FUNCTION IF EXISTS core_appointment_search_vector()",
+]
+
+
+def add_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_FORWARD:
+            schema_editor.execute(statement)
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for statement in POSTGRES_REVERSE:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='notifications',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(add_search_triggers, drop_search_triggers),
+    ]
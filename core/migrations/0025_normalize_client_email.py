@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_emails(apps, schema_editor):
+    # Fails on the unique email index if two clients differ only by case; merge those first
+    ClientProfile = apps.get_model('core', 'ClientProfile')
+    ClientProfile.objects.exclude(email=Lower(Trim('email'))).update(email=Lower(Trim('email')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='clientprofile',
+            constraint=models.CheckConstraint(condition=models.Q(('email', django.db.models.functions.text.Lower('email'))), name='core_client_email_normalized'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.1.5 on 2026-10-17 04:10
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_from_template(apps, schema_editor):
+    # Existing series keep the time they had; completed/no-show templates no longer pass that on
+    RecurrenceRule = apps.get_model('core', 'RecurrenceRule')
+    Appointment = apps.get_model('core', 'Appointment')
+    template = Appointment.objects.filter(pk=OuterRef('appointment_id'))
+    RecurrenceRule.objects.update(
+        time=Subquery(template.values('time')[:1]),
+        end_time=Subquery(template.values('end_time')[:1]),
+    )
+    RecurrenceRule.objects.filter(appointment__status__in=('pending', 'canceled')).update(
+        status=Subquery(template.values('status')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_normalize_client_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurrencerule',
+            name='time',
+            field=models.TimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='recurrencerule',
+            name='end_time',
+            field=models.TimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='recurrencerule',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending Approval'), ('confirmed', 'Confirmed'), ('canceled', 'Canceled')], default='confirmed', max_length=10),
+        ),
+        migrations.RunPython(copy_from_template, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='time',
+            field=models.TimeField(),
+        ),
+        migrations.AlterField(
+            model_name='recurrencerule',
+            name='end_time',
+            field=models.TimeField(),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:00
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # The service catalog and client index need the shared cache from settings.CACHES;
+    # creating its table here means `migrate` alone leaves a working deployment.
+    # createcachetable skips tables that already exist and non-database backends.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_related_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
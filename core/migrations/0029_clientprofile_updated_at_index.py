@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clientprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -1,5 +1,10 @@
-from django.db import models
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
+from django.utils.timezone import now
 
 # User model for authentication and employee designation
 class User(AbstractUser):
@@ -8,6 +13,68 @@ class User(AbstractUser):
         ("employee", "Employee"),
     ]
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default="employee")
+    # Names show up in appointment and notification payloads; see ConditionalListMixin
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+def normalize_email(email):
+    """The form client emails are stored and matched in: trimmed and lower-cased."""
+    return (email or "").strip().lower()
+
+
+# QuerySet for client profiles
+class ClientProfileQuerySet(models.QuerySet):
+    UPSERT_BATCH_SIZE = 500
+
+    def upsert_by_email(self, clients):
+        """
+        Insert unsaved ``clients`` with ``INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING``,
+        one statement per batch, so concurrent bookings for the same new client never
+        collide on the unique email. Existing clients keep their stored details.
+
+        Returns {normalized email: ClientProfile} holding the stored rows, new or existing.
+        Sends no post_save, so the client search index is updated here on commit.
+        """
+        by_email = {}
+        for client in clients:
+            client.email = normalize_email(client.email)
+            by_email.setdefault(client.email, client)  # ON CONFLICT may not touch a row twice
+        if not by_email:
+            return {}
+
+        meta = self.model._meta
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        fields = [field for field in meta.concrete_fields if not field.primary_key]
+        email_column = quote(meta.get_field("email").column)
+        returning = ", ".join(quote(field.column) for field in meta.concrete_fields)
+        placeholders = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+        stored = {}
+        pending = list(by_email.values())
+        with connection.cursor() as cursor:
+            for offset in range(0, len(pending), self.UPSERT_BATCH_SIZE):
+                batch = pending[offset:offset + self.UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    f"INSERT INTO {quote(meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) "
+                    f"VALUES {', '.join([placeholders] * len(batch))} "
+                    # A no-op update rather than DO NOTHING so RETURNING also yields existing rows
+                    f"ON CONFLICT ({email_column}) DO UPDATE SET {email_column} = EXCLUDED.{email_column} "
+                    f"RETURNING {returning}",
+                    [
+                        field.get_db_prep_save(field.pre_save(client, add=True), connection)
+                        for client in batch for field in fields
+                    ],
+                )
+                for row in cursor.fetchall():
+                    client = self.model.from_db(self.db, [field.attname for field in meta.concrete_fields], row)
+                    stored[client.email] = client
+
+        from .client_index import clients_saved
+        saved = list(stored.values())
+        transaction.on_commit(lambda: clients_saved(saved), using=self.db)
+        return stored
+
 
 # ClientProfile model for storing client-specific details
 class ClientProfile(models.Model):
@@ -21,6 +88,22 @@ class ClientProfile(models.Model):
         null=True,
         related_name='clients'  # Tracks clients assigned to an employee
     )
+    # Indexed for the client search index's delta sync (core.client_index)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ClientProfileQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # Emails are stored normalized, so the unique index on email is case-insensitive
+            models.CheckConstraint(
+                condition=models.Q(email=Lower("email")), name="core_client_email_normalized"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -36,12 +119,59 @@ class Service(models.Model):
     name = models.CharField(max_length=100, choices=SERVICE_CHOICES, unique=True)
     description = models.TextField(blank=True, null=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.get_name_display()
 
 
 
+# QuerySet for appointments, shared by the list/detail/reschedule views
+class AppointmentQuerySet(models.QuerySet):
+    # Related columns read by each AppointmentSerializer field beyond the appointment's own
+    LISTING_RELATED_FIELDS = {
+        "client": ("client",),
+        "employee_name": ("employee__first_name", "employee__last_name"),
+        "service": ("service__name",),
+        "service_display": ("service__name",),
+    }
+    # Own columns only loaded when the serializer field of the same name is rendered
+    LISTING_OPTIONAL_FIELDS = ("notes",)
+
+    def for_listing(self, fields=None):
+        """
+        Join everything AppointmentSerializer touches so serializing a page costs one query.
+        ``fields`` (the serializer fields rendered, see SparseFieldsetMixin) limits the
+        joins and optional columns to what those fields read.
+        """
+        if fields is None:
+            fields = {*self.LISTING_RELATED_FIELDS, *self.LISTING_OPTIONAL_FIELDS}
+        related = {path for name in fields for path in self.LISTING_RELATED_FIELDS.get(name, ())}
+        joins = {path.split("__")[0] for path in related}
+        own_fields = [
+            field.name for field in self.model._meta.concrete_fields
+            if field.name not in self.model.UNLISTED_FIELDS
+            and (field.name not in self.LISTING_OPTIONAL_FIELDS or field.name in fields)
+        ]
+        # select_related() with no arguments would follow every foreign key
+        queryset = self.select_related(*sorted(joins)) if joins else self
+        return queryset.only(*own_fields, *sorted(related - joins))
+
+    def overlapping(self, employee, date, start, end):
+        """
+        Active appointments for ``employee`` on ``date`` whose [time, end_time) overlaps [start, end).
+        """
+        return self.filter(
+            employee=employee, date=date, time__lt=end, end_time__gt=start
+        ).exclude(status__in=self.model.INACTIVE_STATUSES)
+
+    def status_counts(self):
+        """
+        Count appointments per status in one conditional-aggregation query.
+        """
+        return self.aggregate(**self.model.status_count_expressions())
+
+
 # Appointment model for scheduling appointments
 class Appointment(models.Model):
     STATUS_CHOICES = [
@@ -51,6 +181,14 @@ class Appointment(models.Model):
         ('canceled', 'Canceled'),
         ('no_show', 'No Show')
     ]
+    # Statuses that free the artist's slot (ignored for availability and double-booking checks)
+    INACTIVE_STATUSES = ('canceled', 'no_show')
+    # Name of the PostgreSQL exclusion constraint added in migration 0018
+    NO_OVERLAP_CONSTRAINT = 'core_appt_no_overlap'
+    # Columns the serializers never read, left out of listing queries
+    UNLISTED_FIELDS = ('search_vector',)
+    # Fields that decide which DailyRevenue row an appointment counts towards, and for how much
+    ROLLUP_FIELDS = ('date', 'employee_id', 'service_id', 'status', 'price')
 
     client = models.ForeignKey(
         'ClientProfile',
@@ -77,7 +215,66 @@ class Appointment(models.Model):
     )
     requires_approval = models.BooleanField(default=False)
     notes = models.TextField(null=True, blank=True)
-    
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Set on rows that belong to a recurring series: the series' first appointment and any
+    # occurrence that was materialized because it was edited. occurrence_date is the
+    # date the occurrence was generated for, which stays fixed if the row is moved.
+    series = models.ForeignKey(
+        'RecurrenceRule',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences'
+    )
+    occurrence_date = models.DateField(null=True, blank=True)
+    # Full-text vector of notes, maintained by a trigger on PostgreSQL (migration 0024);
+    # other backends search the core_appointment_fts FTS5 table instead
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = AppointmentQuerySet.as_manager()
+
+    @classmethod
+    def status_count_expressions(cls):
+        """Aggregate expressions for the total and per-status counts, usable with aggregate() or annotate()."""
+        expressions = {"total": models.Count("id")}
+        for value, _label in cls.STATUS_CHOICES:
+            expressions[value] = models.Count("id", filter=models.Q(status=value))
+        return expressions
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so core.rollups can also refresh the row this appointment leaves
+        instance._rollup_state = instance.rollup_state()
+        return instance
+
+    def rollup_state(self):
+        """
+        (date, employee_id, service_id, status, price) as DailyRevenue sees them, or None
+        if one of them was deferred. Values set from strings are normalized.
+        """
+        state = []
+        for name in self.ROLLUP_FIELDS:
+            if name not in self.__dict__:
+                return None
+            state.append(self._meta.get_field(name).to_python(self.__dict__[name]))
+        return tuple(state)
+
+    class Meta:
+        indexes = [
+            # Supports keyset pagination on (date, time, id)
+            models.Index(fields=["date", "time", "id"], name="core_appt_date_time_id_idx"),
+            # Per-employee listings, overlap checks and availability: employee = ? AND date ...
+            models.Index(fields=["employee", "date", "time"], name="core_appt_emp_date_time_idx"),
+            # status = 'completed' AND date ... (key metrics, series, billing, rollups); the
+            # client column lets the distinct-client counts be answered from the index
+            models.Index(
+                fields=["date", "client"],
+                condition=models.Q(status="completed"),
+                name="core_appt_completed_date_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if self.requires_approval and self.status != "pending":
             self.status = "pending"
@@ -87,6 +284,221 @@ class Appointment(models.Model):
         return f"Appointment for {self.client} with {self.employee} on {self.date}"
 
 
+# QuerySet for recurrence rules
+class RecurrenceRuleQuerySet(models.QuerySet):
+    def in_window(self, start, end):
+        """Rules that may have an occurrence between ``start`` and ``end`` (inclusive)."""
+        return self.filter(starts_on__lte=end).filter(
+            models.Q(ends_on__isnull=True) | models.Q(ends_on__gte=start)
+        )
+
+
+# Recurrence rule for a series of appointments (e.g. sleeve sessions every two weeks).
+# The series is stored once: the attached appointment is the template and first
+# occurrence, later occurrences are expanded on read and only become Appointment rows
+# when one of them is edited. Occurrences take their time and status from the rule, so
+# rescheduling, completing or canceling the template only affects the template's date.
+class RecurrenceRule(models.Model):
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    # Statuses that make sense for occurrences that have not happened yet
+    STATUS_CHOICES = [
+        ('pending', 'Pending Approval'),
+        ('confirmed', 'Confirmed'),
+        ('canceled', 'Canceled'),
+    ]
+
+    appointment = models.OneToOneField(
+        'Appointment',
+        on_delete=models.CASCADE,
+        related_name='recurrence'
+    )
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    interval = models.PositiveSmallIntegerField(default=1)
+    count = models.PositiveSmallIntegerField(null=True, blank=True)   # Total occurrences, including the first
+    until = models.DateField(null=True, blank=True)                   # Last allowed occurrence date
+    starts_on = models.DateField(db_index=True)                       # Date of the first occurrence
+    ends_on = models.DateField(null=True, blank=True, db_index=True)  # Date of the last occurrence; null if open-ended
+    time = models.TimeField()                                         # Start time of every occurrence
+    end_time = models.TimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='confirmed')
+
+    objects = RecurrenceRuleQuerySet.as_manager()
+
+    def _nth_date(self, n):
+        """Date of the n-th step from starts_on, or None if that month has no such day."""
+        if self.frequency == 'daily':
+            return self.starts_on + timedelta(days=n * self.interval)
+        if self.frequency == 'weekly':
+            return self.starts_on + timedelta(weeks=n * self.interval)
+        months = self.starts_on.month - 1 + n * self.interval
+        try:
+            return self.starts_on.replace(year=self.starts_on.year + months // 12, month=months % 12 + 1)
+        except ValueError:
+            return None
+
+    def occurrence_dates(self, start=None, end=None):
+        """
+        Yield occurrence dates between ``start`` and ``end`` (inclusive), in order.
+        Monthly series skip months without the start day (e.g. the 31st).
+        """
+        step = 0
+        produced = 0
+        if start is not None and self.frequency != 'monthly' and not self.count:
+            # Jump straight to the window instead of walking from the first occurrence
+            step_days = self.interval * (7 if self.frequency == 'weekly' else 1)
+            step = max(0, -(-(start - self.starts_on).days // step_days))
+        while True:
+            if self.count and produced >= self.count:
+                return
+            current = self._nth_date(step)
+            step += 1
+            if current is None:
+                continue
+            if (self.until and current > self.until) or (end and current > end):
+                return
+            produced += 1
+            if start is None or current >= start:
+                yield current
+
+    def save(self, *args, **kwargs):
+        if self.starts_on is None:
+            self.starts_on = self.appointment.date
+        if self.time is None:
+            self.time, self.end_time = self.appointment.time, self.appointment.end_time
+        if self.count or self.until:
+            last = None
+            for last in self.occurrence_dates():
+                pass
+            self.ends_on = last
+        else:
+            self.ends_on = None
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Every {self.interval} {self.frequency} from {self.starts_on}"
+
+
+# Completed-appointment revenue per day, employee and service. Kept current by
+# core.signals (see core.rollups) and rebuilt with ``manage.py rebuild_rollups``.
+class DailyRevenue(models.Model):
+    date = models.DateField()
+    employee = models.ForeignKey(
+        'User',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    service = models.ForeignKey(
+        'Service',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    revenue = models.DecimalField(max_digits=12, decimal_places=2)
+    appointments = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "employee", "service"], name="core_dailyrevenue_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.date}: {self.revenue} from {self.appointments} appointment(s)"
+
+
+# QuerySet for tombstones, pruned together with notifications
+class AppointmentTombstoneQuerySet(models.QuerySet):
+    def prune_expired(self, retention_days=None, batch_size=1000):
+        """
+        Delete tombstones older than ``retention_days`` (APPOINTMENT_TOMBSTONE_RETENTION_DAYS
+        by default) in batches of ``batch_size`` and return the count. Sync tokens older
+        than that are refused, so no client can still need them.
+        """
+        if retention_days is None:
+            retention_days = settings.APPOINTMENT_TOMBSTONE_RETENTION_DAYS
+        expired = self.filter(deleted_at__lt=now() - timedelta(days=retention_days))
+        deleted = 0
+        while True:
+            ids = list(expired.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += self.model.objects.filter(id__in=ids)._raw_delete(self.db)
+        return deleted
+
+
+# Record of an appointment that left an employee's schedule (deleted or reassigned),
+# read by the delta-sync endpoint
+class AppointmentTombstone(models.Model):
+    appointment_id = models.BigIntegerField()
+    # Plain ids rather than foreign keys: the rows they pointed to may be gone too
+    employee_id = models.BigIntegerField()
+    date = models.DateField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = AppointmentTombstoneQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Deleted appointment {self.appointment_id} ({self.deleted_at})"
+
+
+# QuerySet for notifications
+class NotificationsQuerySet(models.QuerySet):
+    # Related rows read by each NotificationSerializer field
+    FEED_RELATED_FIELDS = {
+        "employee_name": ("employee",),
+        "appointment_details": ("appointment__client", "appointment__employee", "appointment__service"),
+    }
+    # JSON columns only loaded when the serializer field of the same name is rendered
+    FEED_OPTIONAL_FIELDS = ("changes", "previous_details")
+
+    def for_feed(self, fields=None):
+        """
+        Join everything NotificationSerializer touches (including appointment_details)
+        so the activity feed costs a fixed number of queries however long it is.
+        ``fields`` (the serializer fields rendered) skips the joins and JSON columns of the others.
+        """
+        if fields is None:
+            fields = {*self.FEED_RELATED_FIELDS, *self.FEED_OPTIONAL_FIELDS}
+        related = [path for name in sorted(fields) for path in self.FEED_RELATED_FIELDS.get(name, ())]
+        deferred = ["search_vector", *(name for name in self.FEED_OPTIONAL_FIELDS if name not in fields)]
+        if "appointment_details" in fields:
+            deferred.append("appointment__search_vector")
+        queryset = self.select_related(*related) if related else self
+        return queryset.defer(*deferred)
+
+    def expired(self, retention_days=None):
+        """Notifications older than the retention window (NOTIFICATION_RETENTION_DAYS)."""
+        if retention_days is None:
+            retention_days = settings.NOTIFICATION_RETENTION_DAYS
+        return self.filter(timestamp__lt=now() - timedelta(days=retention_days))
+
+    def prune_expired(self, retention_days=None, batch_size=1000):
+        """
+        Delete expired notifications in batches of ``batch_size`` and return the count.
+
+        Nothing references Notifications, so each batch is a plain DELETE ... WHERE id IN (...)
+        without Django's collector. That skips the per-row delete signal; stream subscribers
+        get one "pruned" event instead and drop everything older than its cutoff.
+        """
+        from .events import publish_removal
+
+        if retention_days is None:
+            retention_days = settings.NOTIFICATION_RETENTION_DAYS
+        # Taken before deleting, so every row older than it is gone once the event arrives
+        before = now() - timedelta(days=retention_days)
+        deleted = 0
+        while True:
+            ids = list(self.expired(retention_days).order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += self.model.objects.filter(id__in=ids)._raw_delete(self.db)
+        if deleted:
+            publish_removal("pruned", {"before": before.isoformat()})
+        return deleted
+
+
 # Notification model for manager approvals
 class Notifications(models.Model):
     APPOINTMENT_ACTIONS = [
@@ -128,6 +540,23 @@ class Notifications(models.Model):
     # New fields for detailed tracking:
     changes = models.JSONField(null=True, blank=True)          # Stores a diff of changed fields.
     previous_details = models.JSONField(null=True, blank=True)   # Stores a snapshot before changes (for reschedules).
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # Full-text vector of the string values in changes; see Appointment.search_vector
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = NotificationsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Supports keyset pagination on (timestamp, id), newest first, and retention range scans
+            models.Index(fields=["timestamp", "id"], name="core_notif_timestamp_id_idx"),
+            # Reschedules look up the open request for an appointment and employee
+            models.Index(
+                fields=["appointment", "employee", "action"],
+                condition=models.Q(status="pending"),
+                name="core_notif_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Notification from {self.employee} - {self.action} ({self.status})"
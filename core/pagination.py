@@ -0,0 +1,168 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _json_value(value):
+    """Ordering key value as stored in a cursor: dates and times as ISO strings."""
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a composite, unique ordering.
+
+    Unlike offset pagination, each page is fetched with a
+    ``WHERE (a, b, id) > (cursor)`` style filter, so the cost of a page does not
+    grow with how deep into the history the client has scrolled.
+    """
+    ordering = ()
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.build_position_filter(self.position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def merge_extra(self, rows, extra):
+        """
+        Merge unsaved objects (e.g. expanded recurring occurrences) into the current page.
+
+        An extra object lands on the page whose key range, from the incoming cursor to
+        ``next_position``, contains its ordering key, with a missing id sorting as 0. Pages
+        stay contiguous and every object appears exactly once, though a page may run past
+        ``page_size`` by the number of extras that fall in its range.
+        """
+        descending = self.ordering[0].startswith("-")
+
+        def key(obj):
+            return [0 if value is None else value for value in self.get_position(obj)]
+
+        def after(a, b):
+            return a < b if descending else a > b
+
+        extra = [
+            obj for obj in extra
+            if (self.position is None or after(key(obj), self.position))
+            and (self.next_position is None or not after(key(obj), self.next_position))
+        ]
+        if not extra:
+            return rows
+        return sorted(rows + extra, key=key, reverse=descending)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_ordering(self, view):
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_position(self, obj):
+        """Return the ordering key of ``obj`` as JSON-serializable values."""
+        return [_json_value(getattr(obj, field.lstrip("-"))) for field in self.ordering]
+
+    def build_position_filter(self, position):
+        """
+        Expand a composite key comparison into the equivalent OR of ANDs, e.g.
+        ``date > d OR (date = d AND time > t) OR (date = d AND time = t AND id > i)``.
+        """
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = {
+                prior.lstrip("-"): value
+                for prior, value in zip(self.ordering[:index], position[:index])
+            }
+            condition |= Q(**equal, **{f"{name}__{lookup}": position[index]})
+        return condition
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, request, model):
+        """
+        Decode the cursor into its ordering key, each value parsed as ``model``'s field
+        type (and re-serialized the way get_position writes it) so a tampered cursor is
+        a 404 rather than a database error.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError("Cursor does not match the ordering")
+            parsed = []
+            for field, value in zip(self.ordering, position):
+                if value is None or isinstance(value, (list, dict, bool)):
+                    raise ValueError("Cursor values must be scalars")
+                parsed.append(_json_value(model._meta.get_field(field.lstrip("-")).to_python(value)))
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return parsed
+
+
+class AppointmentCursorPagination(KeysetPagination):
+    ordering = ("date", "time", "id")
+    ordering_query_param = "ordering"
+    # ?ordering= values and the unique keys they paginate on
+    orderings = {
+        "date": ("date", "time", "id"),
+        "-date": ("-date", "-time", "-id"),
+    }
+
+    def get_ordering(self, view):
+        value = self.request.query_params.get(self.ordering_query_param)
+        if not value:
+            return self.ordering
+        if value not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"Use one of: {', '.join(self.orderings)}."})
+        return self.orderings[value]
+
+
+class NotificationCursorPagination(KeysetPagination):
+    ordering = ("-timestamp", "-id")
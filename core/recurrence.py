@@ -0,0 +1,157 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils.timezone import localdate
+
+from .models import Appointment, RecurrenceRule
+
+# Occurrences this far ahead are checked when a series is created, rescheduled or reassigned
+SERIES_CONFLICT_HORIZON = timedelta(days=366)
+
+
+def rules_for_window(start, end, employee=None):
+    """
+    Recurrence rules with possible occurrences in [start, end], with the template
+    appointment and everything AppointmentSerializer reads already joined.
+    """
+    rules = RecurrenceRule.objects.in_window(start, end).select_related(
+        "appointment__client", "appointment__employee", "appointment__service"
+    )
+    if employee is not None:
+        rules = rules.filter(appointment__employee=employee)
+    return rules
+
+
+def pending_occurrences(rules, start, end):
+    """
+    Yield (rule, date) for the occurrences of ``rules`` in [start, end] that have not been
+    materialized as rows (the template counts as materialized). One query in total.
+    """
+    rules = list(rules)
+    if not rules:
+        return
+
+    materialized = set(
+        Appointment.objects.filter(series__in=rules, occurrence_date__range=(start, end))
+        .values_list("series", "occurrence_date")
+    )
+    for rule in rules:
+        for occurrence_date in rule.occurrence_dates(start, end):
+            if (rule.id, occurrence_date) not in materialized:
+                yield rule, occurrence_date
+
+
+def expand_occurrences(rules, start, end):
+    """Unsaved Appointment instances for the pending occurrences in [start, end], ordered by date and time."""
+    occurrences = [
+        virtual_occurrence(rule, occurrence_date)
+        for rule, occurrence_date in pending_occurrences(rules, start, end)
+    ]
+    occurrences.sort(key=lambda appt: (appt.date, appt.time))
+    return occurrences
+
+
+def virtual_occurrence(rule, occurrence_date):
+    """
+    An unsaved copy of the series template placed on ``occurrence_date``, at the series'
+    time and with its status (the template's own time and status only apply to its date).
+    """
+    template = rule.appointment
+    return Appointment(
+        client=template.client,
+        employee=template.employee,
+        service=template.service,
+        date=occurrence_date,
+        time=rule.time,
+        end_time=rule.end_time,
+        price=template.price,
+        status=rule.status,
+        requires_approval=False,
+        notes=template.notes,
+        series=rule,
+        occurrence_date=occurrence_date,
+    )
+
+
+def occurrence_conflicts(employee, date, start, end, exclude_series=None):
+    """
+    Whether an unmaterialized occurrence of one of ``employee``'s active series overlaps
+    [start, end) on ``date``. Complements AppointmentQuerySet.overlapping(), which only
+    sees stored rows.
+    """
+    rules = RecurrenceRule.objects.in_window(date, date).filter(
+        appointment__employee=employee, time__lt=end, end_time__gt=start
+    ).exclude(status__in=Appointment.INACTIVE_STATUSES)
+    if exclude_series is not None:
+        rules = rules.exclude(pk=exclude_series.pk)
+    return any(True for _ in pending_occurrences(rules, date, date))
+
+
+def series_clash(rule, employee_id, horizon=SERIES_CONFLICT_HORIZON):
+    """
+    First unstored occurrence of ``rule`` from tomorrow (or the day after the first
+    occurrence) up to ``horizon`` ahead that would overlap a stored booking or another
+    series of ``employee_id``. None when the series is canceled or nothing clashes.
+    """
+    if rule.status in Appointment.INACTIVE_STATUSES:
+        return None
+    start = max(rule.starts_on + timedelta(days=1), localdate())
+    end = start + horizon
+    if rule.pk is None:
+        dates = set(rule.occurrence_dates(start, end))
+    else:
+        dates = {day for _, day in pending_occurrences([rule], start, end)}
+    if not dates:
+        return None
+
+    clashes = set(
+        Appointment.objects.filter(
+            employee=employee_id, date__in=dates, time__lt=rule.end_time, end_time__gt=rule.time,
+        )
+        .exclude(status__in=Appointment.INACTIVE_STATUSES)
+        .values_list("date", flat=True)
+    )
+    others = (
+        RecurrenceRule.objects.in_window(start, end)
+        .filter(appointment__employee=employee_id, time__lt=rule.end_time, end_time__gt=rule.time)
+        .exclude(status__in=Appointment.INACTIVE_STATUSES)
+    )
+    if rule.pk is not None:
+        others = others.exclude(pk=rule.pk)
+    clashes.update(day for _, day in pending_occurrences(others, start, end) if day in dates)
+    return min(clashes) if clashes else None
+
+
+def booked_slots(employee_ids, first_date, last_date):
+    """
+    Active bookings of ``employee_ids`` between ``first_date`` and ``last_date``, stored
+    rows and unstored series occurrences alike, as {(employee_id, date): [(appointment_id,
+    start, end), ...]} with appointment_id None for occurrences. A fixed three queries.
+    """
+    booked = defaultdict(list)
+    existing = (
+        Appointment.objects.filter(employee__in=employee_ids, date__range=(first_date, last_date))
+        .exclude(status__in=Appointment.INACTIVE_STATUSES)
+        .values_list("id", "employee", "date", "time", "end_time")
+    )
+    for appointment_id, employee_id, day, start, end in existing:
+        booked[(employee_id, day)].append((appointment_id, start, end))
+
+    rules = (
+        RecurrenceRule.objects.in_window(first_date, last_date)
+        .filter(appointment__employee__in=employee_ids)
+        .exclude(status__in=Appointment.INACTIVE_STATUSES)
+        .select_related("appointment")
+    )
+    for rule, day in pending_occurrences(rules, first_date, last_date):
+        booked[(rule.appointment.employee_id, day)].append((None, rule.time, rule.end_time))
+    return booked
+
+
+def overlaps(bookings, start, end, exclude=None):
+    """Whether [start, end) overlaps one of ``booked_slots``' entries, ignoring appointment ``exclude``."""
+    return any(
+        start < other_end and end > other_start
+        for appointment_id, other_start, other_end in bookings
+        if exclude is None or appointment_id != exclude
+    )
@@ -0,0 +1,121 @@
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Appointment, DailyRevenue
+
+ROLLUP_BATCH_SIZE = 1000
+
+
+def _completed_totals(queryset):
+    return (
+        queryset.filter(status="completed")
+        .values_list("date", "employee", "service")
+        .annotate(revenue=Sum("price"), appointments=Count("id"))
+        .order_by()
+    )
+
+
+def refresh_daily_revenue(keys):
+    """
+    Recompute the DailyRevenue rows for a set of (date, employee_id, service_id) keys from
+    the appointments table: one grouped query, one upsert and one delete for keys that no
+    longer have completed appointments. Recomputing instead of applying deltas keeps the
+    rows exact however the appointments changed.
+
+    The keys are locked first, until the surrounding transaction ends: a placeholder row
+    is inserted for keys that have none (ON CONFLICT DO NOTHING, which waits on a
+    concurrent insert of the same key) and every row is taken with SELECT ... FOR UPDATE.
+    A concurrent writer of the same key therefore recomputes only after this one commits,
+    and sees its appointments; without the lock the later commit would overwrite the
+    other's total with one that missed its uncommitted rows.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    match = reduce(or_, (Q(date=day, employee=employee, service=service) for day, employee, service in keys))
+
+    with transaction.atomic():
+        DailyRevenue.objects.bulk_create(
+            [
+                DailyRevenue(date=day, employee_id=employee, service_id=service, revenue=0, appointments=0)
+                for day, employee, service in keys
+            ],
+            ignore_conflicts=True,
+        )
+        # Locked in key order, so writers touching several of the same keys cannot deadlock
+        list(DailyRevenue.objects.select_for_update().filter(match).order_by("date", "employee", "service")
+             .values_list("id", flat=True))
+
+        totals = _completed_totals(Appointment.objects.filter(
+            date__in={key[0] for key in keys},
+            employee__in={key[1] for key in keys},
+            service__in={key[2] for key in keys},
+        ))
+        rows = [
+            DailyRevenue(date=day, employee_id=employee, service_id=service, revenue=revenue, appointments=count)
+            for day, employee, service, revenue, count in totals
+            if (day, employee, service) in keys
+        ]
+        stale = set(keys) - {(row.date, row.employee_id, row.service_id) for row in rows}
+
+        if rows:
+            DailyRevenue.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["date", "employee", "service"],
+                update_fields=["revenue", "appointments"],
+            )
+        if stale:
+            DailyRevenue.objects.filter(reduce(or_, (
+                Q(date=day, employee=employee, service=service) for day, employee, service in stale
+            ))).delete()
+
+
+def sync_daily_revenue(appointments):
+    """
+    Refresh the rollup rows touched by saved ``appointments``: the row each one counted
+    towards when loaded and the row it counts towards now, for those whose rollup
+    inputs changed. Also used after bulk_create/bulk_update, which send no signals.
+    """
+    keys = set()
+    for appointment in appointments:
+        old, new = getattr(appointment, "_rollup_state", None), appointment.rollup_state()
+        if old == new:
+            continue
+        for state in (old, new):
+            if state is not None and state[3] == "completed":
+                keys.add(state[:3])
+        appointment._rollup_state = new
+    refresh_daily_revenue(keys)
+
+
+def rebuild_daily_revenue(start=None, end=None, batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Replace the DailyRevenue rows between ``start`` and ``end`` (inclusive, open-ended when
+    None) with totals computed from scratch. Returns the number of rows written.
+    """
+    appointments = Appointment.objects.all()
+    rollups = DailyRevenue.objects.all()
+    if start is not None:
+        appointments, rollups = appointments.filter(date__gte=start), rollups.filter(date__gte=start)
+    if end is not None:
+        appointments, rollups = appointments.filter(date__lte=end), rollups.filter(date__lte=end)
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for day, employee, service, revenue, count in _completed_totals(appointments).iterator(chunk_size=batch_size):
+            batch.append(DailyRevenue(
+                date=day, employee_id=employee, service_id=service, revenue=revenue, appointments=count
+            ))
+            if len(batch) >= batch_size:
+                DailyRevenue.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        DailyRevenue.objects.bulk_create(batch)
+        written += len(batch)
+    return written
@@ -0,0 +1,42 @@
+import logging
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_pruner = None
+
+
+def _prune_loop(interval, stop_event):
+    from .models import AppointmentTombstone, Notifications
+
+    while not stop_event.wait(interval):
+        try:
+            deleted = Notifications.objects.prune_expired()
+            if deleted:
+                logger.info("Pruned %s expired notification(s).", deleted)
+            deleted = AppointmentTombstone.objects.prune_expired()
+            if deleted:
+                logger.info("Pruned %s expired appointment tombstone(s).", deleted)
+        except Exception:
+            logger.exception("Notification pruning failed.")
+        finally:
+            close_old_connections()
+
+
+def start_notification_pruner(interval):
+    """
+    Start a daemon thread that prunes expired notifications (and appointment tombstones)
+    every ``interval`` seconds.
+    Only one pruner runs per process; returns the stop event.
+    """
+    global _pruner
+    if _pruner is None:
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=_prune_loop, args=(interval, stop_event), name="notification-pruner", daemon=True
+        )
+        thread.start()
+        _pruner = stop_event
+    return _pruner
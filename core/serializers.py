@@ -1,6 +1,10 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth.models import User
-from .models import User, Service, Appointment, ClientProfile, Notifications
+from django.db import IntegrityError, transaction
+from .models import User, Service, Appointment, ClientProfile, Notifications, RecurrenceRule, normalize_email
+from .recurrence import SERIES_CONFLICT_HORIZON, occurrence_conflicts, series_clash
 
 # User Serializer
 class UserSerializer(serializers.ModelSerializer):
@@ -49,11 +53,25 @@ class ClientProfileSerializer(serializers.ModelSerializer):
     Serializer for ClientProfile model.
     """
     employee = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+    email = serializers.EmailField(
+        max_length=254, validators=[UniqueValidator(queryset=ClientProfile.objects.all(), lookup="iexact")]
+    )
 
     class Meta:
         model = ClientProfile
         fields = ['id', 'first_name', 'last_name', 'email', 'phone', 'employee']
 
+    def validate_email(self, value):
+        return normalize_email(value)
+
+
+class NewClientSerializer(ClientProfileSerializer):
+    """
+    Client details sent along with a booking. An email that already belongs to a client
+    books for that client (see AppointmentSerializer.create) instead of failing validation.
+    """
+    email = serializers.EmailField(max_length=254)
+
 # Service Serializer
 class ServiceSerializer(serializers.ModelSerializer):
     name_display = serializers.CharField(source='get_name_display', read_only=True)  # ✅ Fix applied
@@ -67,13 +85,54 @@ class ServiceSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'name_display', 'description', 'price']
 
 
+# Sparse fieldsets for read endpoints
+def _field_names(value):
+    names = {name.strip() for name in (value or "").split(",")}
+    return names - {""} or None
+
+
+class SparseFieldsetMixin:
+    """
+    Renders only the fields named in ``?fields=a,b`` and drops those in ``?omit=a,b`` on
+    read requests. Views pass ``sparse_fields(request)`` to the queryset so omitted
+    fields are not loaded either.
+    """
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        selected = self.sparse_fields(request) if request is not None else None
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def sparse_fields(cls, request):
+        """Names of the readable fields ``request`` asks for, or None for all of them."""
+        if request.method not in SAFE_METHODS:
+            return None
+        fields = _field_names(request.query_params.get(cls.fields_query_param))
+        omit = _field_names(request.query_params.get(cls.omit_query_param))
+        if fields is None and omit is None:
+            return None
+
+        readable = {name for name, field in cls().fields.items() if not field.write_only}
+        for param, names in ((cls.fields_query_param, fields), (cls.omit_query_param, omit)):
+            unknown = (names or set()) - readable
+            if unknown:
+                raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(sorted(unknown))}."})
+        return (fields or readable) - (omit or set())
+
+
 # Appointment Serializer
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     client = ClientProfileSerializer(read_only=True)
     client_id = serializers.PrimaryKeyRelatedField(
         queryset=ClientProfile.objects.all(), source="client", write_only=True, required=False
     )
-    new_client = ClientProfileSerializer(write_only=True, required=False)
+    new_client = NewClientSerializer(write_only=True, required=False)
 
     employee = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), required=True
@@ -88,8 +147,10 @@ class AppointmentSerializer(serializers.ModelSerializer):
         model = Appointment
         fields = [
             "id", "client", "client_id", "new_client", "employee", "employee_name", "service", "service_display",
-            "date", "time", "end_time", "price", "status", "notes", "requires_approval"
+            "date", "time", "end_time", "price", "status", "notes", "requires_approval",
+            "series", "occurrence_date"
         ]
+        read_only_fields = ["series", "occurrence_date"]
 
     def get_employee_name(self, obj):
         """Return full name of the assigned employee."""
@@ -113,24 +174,194 @@ class AppointmentSerializer(serializers.ModelSerializer):
         end_time = data.get("end_time")
         if start_time and end_time and end_time <= start_time:
             raise serializers.ValidationError({"end_time": "End time must be after start time."})
+
+        self._validate_no_overlap(data)
+        self._validate_series_employee(data)
         return data
 
+    def _validate_series_employee(self, data):
+        """
+        Occurrences of a series follow its template's employee, so reassigning a template
+        moves the whole series: check its upcoming occurrences against the new employee.
+        """
+        employee = data.get("employee")
+        if self.instance is None or employee is None or employee.pk == self.instance.employee_id:
+            return
+        rule = RecurrenceRule.objects.filter(appointment=self.instance).first()
+        clash = series_clash(rule, employee.pk) if rule is not None else None
+        if clash is not None:
+            raise serializers.ValidationError(
+                {"employee": f"The series occurrence on {clash} overlaps another appointment for this employee."}
+            )
+
+    def _validate_no_overlap(self, data):
+        """
+        Reject bookings that overlap another active appointment for the same employee,
+        including occurrences of recurring series that are not stored yet.
+        PostgreSQL also enforces this with an exclusion constraint (see save_with_overlap_guard).
+        """
+        def current(field):
+            return data[field] if field in data else getattr(self.instance, field, None)
+
+        employee, appt_date = current("employee"), current("date")
+        start_time, end_time = current("time"), current("end_time")
+        if not all((employee, appt_date, start_time, end_time)):
+            return
+        if current("status") in Appointment.INACTIVE_STATUSES:
+            return
+
+        conflicts = Appointment.objects.overlapping(employee, appt_date, start_time, end_time)
+        if self.instance is not None:
+            conflicts = conflicts.exclude(pk=self.instance.pk)
+        if conflicts.exists() or occurrence_conflicts(
+            employee, appt_date, start_time, end_time, exclude_series=self.context.get("series")
+        ):
+            raise serializers.ValidationError(
+                {"time": "This employee already has an appointment during this time."}
+            )
+
+    def save_with_overlap_guard(self, write):
+        """
+        Run ``write`` in a savepoint and turn an exclusion-constraint violation from a
+        concurrent booking into a validation error instead of a 500.
+        """
+        try:
+            with transaction.atomic():
+                return write()
+        except IntegrityError as exc:
+            if Appointment.NO_OVERLAP_CONSTRAINT in str(exc):
+                raise serializers.ValidationError(
+                    {"time": "This employee already has an appointment during this time."}
+                )
+            raise
+
     def create(self, validated_data):
         client = validated_data.pop("client", None)
         new_client_data = validated_data.pop("new_client", None)
 
-        if client is None and new_client_data:
-            email = new_client_data.get("email")
-            client = ClientProfile.objects.filter(email=email).first()
-            if client is None:
-                client = ClientProfile.objects.create(**new_client_data)
-        if client is None:
+        if client is None and not new_client_data:
             raise serializers.ValidationError({"client": "A client is required."})
-        return Appointment.objects.create(client=client, **validated_data)
+
+        def write():
+            booked_client = client
+            if booked_client is None:
+                # One INSERT ... ON CONFLICT: an existing client with this email is reused, never duplicated.
+                # Same savepoint as the booking, so a rejected booking leaves no new client behind
+                upserted = ClientProfile.objects.upsert_by_email([ClientProfile(**new_client_data)])
+                booked_client = upserted[normalize_email(new_client_data["email"])]
+            return Appointment.objects.create(client=booked_client, **validated_data)
+
+        return self.save_with_overlap_guard(write)
 
     def update(self, instance, validated_data):
         validated_data["client"] = validated_data.get("client", instance.client)
-        return super().update(instance, validated_data)
+        return self.save_with_overlap_guard(lambda: super(AppointmentSerializer, self).update(instance, validated_data))
+
+
+# Recurrence Rule Serializer
+class RecurrenceRuleSerializer(serializers.ModelSerializer):
+    # Occurrences this far ahead are checked for clashes when a series is created or rescheduled
+    conflict_horizon = SERIES_CONFLICT_HORIZON
+
+    class Meta:
+        model = RecurrenceRule
+        fields = [
+            "id", "appointment", "frequency", "interval", "count", "until", "starts_on", "ends_on",
+            "time", "end_time", "status",
+        ]
+        read_only_fields = ["appointment", "starts_on", "ends_on"]
+        # Default to the template's time when a series is created
+        extra_kwargs = {"time": {"required": False}, "end_time": {"required": False}}
+
+    def validate(self, data):
+        appointment = self.context["appointment"]
+        if data.get("interval", 1) < 1:
+            raise serializers.ValidationError({"interval": "Interval must be at least 1."})
+        if data.get("count") is not None and data["count"] < 2:
+            raise serializers.ValidationError({"count": "A series needs at least two occurrences."})
+        starts_on = self.instance.starts_on if self.instance is not None else appointment.date
+        if data.get("until") is not None and data["until"] <= starts_on:
+            raise serializers.ValidationError({"until": "Until must be after the first appointment."})
+
+        if self.instance is None:
+            data.setdefault("time", appointment.time)
+            data.setdefault("end_time", appointment.end_time)
+            data.setdefault("status", "pending" if appointment.status == "pending" else "confirmed")
+            rule = RecurrenceRule(appointment=appointment, starts_on=appointment.date, **data)
+        else:
+            rule = RecurrenceRule(**{
+                field.attname: getattr(self.instance, field.attname) for field in RecurrenceRule._meta.concrete_fields
+            })
+            for field, value in data.items():
+                setattr(rule, field, value)
+        if rule.end_time <= rule.time:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+
+        clash = series_clash(rule, appointment.employee_id, self.conflict_horizon)
+        if clash is not None:
+            raise serializers.ValidationError(
+                {"time": f"The occurrence on {clash} overlaps another appointment for this employee."}
+            )
+        return data
+
+
+# Bulk import serializers
+class ImportListSerializer(serializers.ListSerializer):
+    """
+    Validates a batch row by row and keeps the valid rows instead of rejecting the
+    whole batch. validated_data is a list of (row_index, data); per-row errors are
+    collected in ``row_errors``.
+    """
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({"non_field_errors": ["Expected a list of rows."]})
+        self.row_errors = {}
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+        return rows
+
+
+class AppointmentImportSerializer(serializers.Serializer):
+    """
+    Flat appointment row for bulk creation and CSV import. Validation does not touch
+    the database; clients, employees and services are resolved for the whole batch at once.
+    A row names either an existing ``client_id`` or a ``client_email`` (plus name and
+    phone when the client is new).
+    """
+    client_id = serializers.IntegerField(required=False)
+    client_email = serializers.EmailField(required=False)
+    client_first_name = serializers.CharField(max_length=100, required=False)
+    client_last_name = serializers.CharField(max_length=100, required=False)
+    client_phone = serializers.CharField(max_length=15, required=False)
+    employee = serializers.IntegerField()
+    service = serializers.ChoiceField(choices=Service.SERVICE_CHOICES)
+    date = serializers.DateField()
+    time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    status = serializers.ChoiceField(choices=Appointment.STATUS_CHOICES, default="confirmed")
+    requires_approval = serializers.BooleanField(default=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    class Meta:
+        list_serializer_class = ImportListSerializer
+
+    def validate_client_email(self, value):
+        return normalize_email(value)
+
+    def validate(self, data):
+        if ("client_id" in data) == ("client_email" in data):
+            raise serializers.ValidationError({"client": "Provide either 'client_id' or 'client_email'."})
+        if data["end_time"] <= data["time"]:
+            raise serializers.ValidationError({"end_time": "End time must be after start time."})
+        if data["requires_approval"]:
+            # Mirrors Appointment.save(), which bulk_create bypasses
+            data["status"] = "pending"
+        return data
 
 
 # Appointment Overview Serializer
@@ -142,7 +373,7 @@ class AppointmentOverviewSerializer(serializers.Serializer):
     no_show = serializers.IntegerField()
 
 # Notification Serializer
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     appointment_details = serializers.SerializerMethodField()
     employee_name = serializers.SerializerMethodField()
 
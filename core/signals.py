@@ -0,0 +1,78 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import invalidate_service_catalog
+from .client_index import client_deleted, clients_saved
+from .events import publish_notifications, publish_removal
+from .fulltext import install_sqlite_fts
+from .models import Appointment, AppointmentTombstone, ClientProfile, Notifications, Service
+from .rollups import refresh_daily_revenue, sync_daily_revenue
+
+
+@receiver(post_migrate)
+def install_search_fallback(sender, using, **kwargs):
+    # PostgreSQL search is set up by migration 0024; SQLite gets FTS5 tables instead
+    if sender.name == "core" and connections[using].vendor == "sqlite":
+        install_sqlite_fts(connections[using])
+
+
+@receiver([post_save, post_delete], sender=Service)
+def service_changed(sender, **kwargs):
+    # After commit, so other workers never rebuild the catalog from uncommitted rows
+    transaction.on_commit(invalidate_service_catalog)
+
+
+@receiver(post_save, sender=ClientProfile)
+def client_profile_saved(sender, instance, **kwargs):
+    # After commit, so a rolled-back write never shows up in search
+    transaction.on_commit(lambda: clients_saved([instance]))
+
+
+@receiver(post_delete, sender=ClientProfile)
+def client_profile_deleted(sender, instance, **kwargs):
+    client_id = instance.pk
+    transaction.on_commit(lambda: client_deleted(client_id))
+
+
+@receiver(pre_save, sender=Appointment)
+def appointment_saving(sender, instance, **kwargs):
+    # Instances not loaded with all rollup fields need the stored values to know which row they leave
+    if not instance._state.adding and getattr(instance, "_rollup_state", None) is None:
+        instance._rollup_state = (
+            Appointment.objects.filter(pk=instance.pk).values_list(*Appointment.ROLLUP_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, **kwargs):
+    # A reassigned appointment leaves the previous employee's delta sync like a deletion;
+    # read before sync_daily_revenue moves _rollup_state on to the saved values
+    stored = getattr(instance, "_rollup_state", None)
+    if stored is not None and stored[1] != instance.employee_id:
+        AppointmentTombstone.objects.create(appointment_id=instance.pk, employee_id=stored[1], date=stored[0])
+    sync_daily_revenue([instance])
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    # Lets /appointments/changes/ report deletions to clients syncing from a watermark
+    AppointmentTombstone.objects.create(
+        appointment_id=instance.pk, employee_id=instance.employee_id, date=instance.date
+    )
+    # The stored values are what the rollup counted; in-memory edits were never saved
+    stored = getattr(instance, "_rollup_state", None)
+    if stored is not None and stored[3] == "completed":
+        refresh_daily_revenue([stored[:3]])
+
+
+@receiver(post_save, sender=Notifications)
+def notification_saved(sender, instance, created, **kwargs):
+    # Only push once the row is visible to clients that refetch it
+    publish_notifications([instance.pk], "created" if created else "updated")
+
+
+@receiver(post_delete, sender=Notifications)
+def notification_deleted(sender, instance, **kwargs):
+    # prune_expired deletes without signals and publishes a single "pruned" event instead
+    publish_removal("deleted", {"id": instance.pk, "employee": instance.employee_id})
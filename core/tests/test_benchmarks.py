@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from benchmarks.runner import ENDPOINTS, run_benchmarks
+from benchmarks.seed import ShopConfig, seed_shop
+from core.models import Appointment, DailyRevenue
+
+
+class BenchmarkSuiteTest(TestCase):
+    """
+    Test the benchmark suite against a tiny synthetic shop.
+    """
+
+    def test_run_benchmarks_reports_every_endpoint(self):
+        """
+        Test every endpoint answers successfully and is reported with timings, queries and memory.
+        """
+        config = ShopConfig(artists=2, clients=5, appointments=60, years=1, notifications=10)
+        report = run_benchmarks(config, repeat=1)
+
+        self.assertEqual(report["meta"]["shop"]["appointments"], 60)
+        self.assertEqual(set(report["results"]), {name for name, *_ in ENDPOINTS})
+        for name, result in report["results"].items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreater(result["queries"], 0, name)
+            self.assertEqual(set(result["wall_ms"]), {"min", "median", "mean", "max"})
+        self.assertEqual(Appointment.objects.count(), 60)
+        self.assertTrue(DailyRevenue.objects.exists())
+
+    def test_seed_rejects_more_appointments_than_slots(self):
+        """
+        Test seeding refuses a shop that cannot hold the requested appointments without overlaps.
+        """
+        with self.assertRaises(ValueError):
+            seed_shop(ShopConfig(artists=1, clients=1, appointments=10 ** 6, years=1, notifications=0))
@@ -0,0 +1,158 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import User, ClientProfile, Service, Appointment, AppointmentTombstone, DailyRevenue, Notifications
+
+
+class PruneNotificationsCommandTest(TestCase):
+    """
+    Test the prune_notifications management command.
+    """
+
+    def setUp(self):
+        self.employee = User.objects.create(username='employee')
+        self.fresh = Notifications.objects.create(employee=self.employee, action='created')
+        old = [Notifications.objects.create(employee=self.employee, action='created') for _ in range(5)]
+        Notifications.objects.filter(id__in=[n.id for n in old]).update(timestamp=now() - timedelta(days=45))
+
+    def test_prune_deletes_only_expired(self):
+        """
+        Test expired notifications are deleted across several batches and fresh ones are kept.
+        """
+        out = StringIO()
+        call_command('prune_notifications', '--batch-size=2', stdout=out)
+        self.assertIn('Deleted 5 notification(s)', out.getvalue())
+        self.assertEqual(list(Notifications.objects.values_list('id', flat=True)), [self.fresh.id])
+
+    def test_prune_deletes_expired_tombstones(self):
+        """
+        Test appointment tombstones past their retention are pruned with the notifications.
+        """
+        fresh = AppointmentTombstone.objects.create(appointment_id=1, employee_id=self.employee.id, date=now().date())
+        old = AppointmentTombstone.objects.create(appointment_id=2, employee_id=self.employee.id, date=now().date())
+        AppointmentTombstone.objects.filter(pk=old.pk).update(deleted_at=now() - timedelta(days=45))
+        out = StringIO()
+        call_command('prune_notifications', stdout=out)
+        self.assertIn('Deleted 1 expired appointment tombstone(s)', out.getvalue())
+        self.assertEqual(list(AppointmentTombstone.objects.values_list('id', flat=True)), [fresh.id])
+
+    def test_recent_activity_is_read_only(self):
+        """
+        Test listing recent activity hides expired notifications without deleting them.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.employee)
+        response = client.get(reverse('recent-activity'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.fresh.id])
+        self.assertEqual(Notifications.objects.count(), 6)
+
+
+class ImportAppointmentsCommandTest(TestCase):
+    """
+    Test the import_appointments management command.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create(username='adminuser', role='admin')
+        self.artist = User.objects.create(username='artist')
+        Service.objects.create(name='service_1', price=150.00)
+        self.existing = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+
+    def _write_csv(self, lines):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        handle.write('\n'.join(lines) + '\n')
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_import_creates_rows_and_reports_errors(self):
+        """
+        Test valid rows are imported, new clients are created once and bad rows are reported by line.
+        """
+        header = 'client_email,client_first_name,client_last_name,client_phone,employee,service,date,time,end_time,price'
+        a = self.artist.id
+        path = self._write_csv([
+            header,
+            f'john.doe@example.com,,,,{a},service_1,2025-03-01,10:00,12:00,200',
+            f'jane@example.com,Jane,Roe,555,{a},service_1,2025-03-01,12:00,13:00,100',
+            f'jane@example.com,Jane,Roe,555,{a},service_1,2025-03-02,12:00,13:00,100',
+            f'jane@example.com,Jane,Roe,555,{a},service_1,2025-03-01,11:00,12:30,100',
+            f'new@example.com,,,,{a},service_1,2025-03-03,10:00,12:00,200',
+            f'jane@example.com,Jane,Roe,555,{a},service_9,2025-03-04,10:00,12:00,200',
+        ])
+        out, err = StringIO(), StringIO()
+        call_command('import_appointments', path, '--user=adminuser', '--batch-size=2', stdout=out, stderr=err)
+
+        self.assertIn('Imported 3 appointment(s); 3 row(s) rejected.', out.getvalue())
+        self.assertIn('Line 5:', err.getvalue())
+        self.assertIn('Line 6:', err.getvalue())
+        self.assertIn('Line 7:', err.getvalue())
+        self.assertEqual(Appointment.objects.filter(client=self.existing).count(), 1)
+        self.assertEqual(ClientProfile.objects.filter(email='jane@example.com').count(), 1)
+        self.assertEqual(Appointment.objects.filter(client__email='jane@example.com').count(), 2)
+        self.assertFalse(Notifications.objects.exists())
+
+    def test_import_reports_constraint_race(self):
+        """
+        Test a batch rejected by the database overlap constraint reports its rows instead of raising.
+        """
+        header = 'client_email,client_first_name,client_last_name,client_phone,employee,service,date,time,end_time,price'
+        path = self._write_csv([header, f'jane@example.com,Jane,Roe,555,{self.artist.id},service_1,2025-03-01,10:00,12:00,200'])
+        error = IntegrityError(f'conflicting key value violates exclusion constraint "{Appointment.NO_OVERLAP_CONSTRAINT}"')
+        out, err = StringIO(), StringIO()
+        with patch.object(Appointment.objects, 'bulk_create', side_effect=error):
+            call_command('import_appointments', path, '--user=adminuser', stdout=out, stderr=err)
+
+        self.assertIn('Imported 0 appointment(s); 1 row(s) rejected.', out.getvalue())
+        self.assertIn('Line 2:', err.getvalue())
+        self.assertFalse(ClientProfile.objects.filter(email='jane@example.com').exists())
+
+    def test_import_requires_known_user(self):
+        """
+        Test an unknown --user is a command error.
+        """
+        path = self._write_csv(['employee'])
+        with self.assertRaises(CommandError):
+            call_command('import_appointments', path, '--user=nobody')
+
+
+class RebuildRollupsCommandTest(TestCase):
+    """
+    Test the rebuild_rollups management command.
+    """
+
+    def setUp(self):
+        artist = User.objects.create(username='artist')
+        service = Service.objects.create(name='service_1', price=150.00)
+        client = ClientProfile.objects.create(first_name='John', last_name='Doe', email='john@example.com', phone='555')
+        self.day = now().date() - timedelta(days=3)
+        for hour, appt_status in [(10, 'completed'), (12, 'completed'), (14, 'canceled')]:
+            Appointment.objects.create(
+                client=client, employee=artist, service=service, date=self.day,
+                time=f'{hour}:00', end_time=f'{hour + 1}:00', price=100.00, status=appt_status
+            )
+
+    def test_rebuild_recomputes_rows(self):
+        """
+        Test the rollup is rebuilt from appointments after it drifted.
+        """
+        DailyRevenue.objects.update(revenue=1, appointments=9)
+        out = StringIO()
+        call_command('rebuild_rollups', f'--from={self.day}', stdout=out)
+        self.assertIn('Wrote 1 daily revenue row(s)', out.getvalue())
+        row = DailyRevenue.objects.get()
+        self.assertEqual((row.date, row.revenue, row.appointments), (self.day, 200, 2))
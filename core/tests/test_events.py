@@ -0,0 +1,158 @@
+import asyncio
+import threading
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+
+from core.events import InProcessBroker, get_broker
+from core.importing import import_appointments
+from core.models import User, Notifications, Service
+
+
+class RecordingBroker(InProcessBroker):
+    """
+    Local stand-in that also keeps every published message.
+    """
+    def __init__(self):
+        super().__init__()
+        self.published = []
+        self.listening = True
+
+    def has_subscribers(self):
+        return self.listening
+
+    def publish(self, message):
+        self.published.append(message)
+        super().publish(message)
+
+
+class InProcessBrokerTest(TestCase):
+    """
+    Test the in-process pub/sub used by the notification stream.
+    """
+
+    def test_publish_from_another_thread_reaches_subscriber(self):
+        """
+        Test a message published from a worker thread is delivered to an async subscriber.
+        """
+        broker = InProcessBroker()
+
+        async def scenario():
+            subscription = broker.subscribe()
+            thread = threading.Thread(target=broker.publish, args=({"event": "created"},))
+            thread.start()
+            message = await asyncio.wait_for(subscription.get(), timeout=1)
+            thread.join()
+            broker.unsubscribe(subscription)
+            return message
+
+        self.assertEqual(asyncio.run(scenario()), {"event": "created"})
+
+
+@override_settings(NOTIFICATION_BROKER='core.tests.test_events.RecordingBroker')
+class NotificationStreamTest(TestCase):
+    """
+    Test notifications are pushed to the broker and the stream is admin-only.
+    """
+
+    def setUp(self):
+        self.employee = User.objects.create(username='employee')
+
+    def test_notification_is_published_on_commit(self):
+        """
+        Test creating a notification publishes a 'created' event once the transaction commits.
+        """
+        broker = get_broker()
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = Notifications.objects.create(employee=self.employee, action='created')
+        self.assertEqual(broker.published[-1]['event'], 'created')
+        self.assertEqual(broker.published[-1]['notification']['id'], notification.id)
+
+    def test_stream_requires_admin(self):
+        """
+        Test non-admin users cannot open the notification stream.
+        """
+        self.client.force_login(self.employee)
+        response = self.client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_nothing_is_serialized_without_subscribers(self):
+        """
+        Test a notification write with nobody listening publishes nothing and runs no extra query.
+        """
+        broker = get_broker()
+        broker.listening = False
+        published = len(broker.published)
+        try:
+            with self.captureOnCommitCallbacks() as callbacks:
+                Notifications.objects.create(employee=self.employee, action='created')
+            with CaptureQueriesContext(connection) as queries:
+                for callback in callbacks:
+                    callback()
+        finally:
+            broker.listening = True
+        self.assertEqual(len(broker.published), published)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_deletes_and_prunes_are_published(self):
+        """
+        Test deleting a notification publishes 'deleted' and pruning publishes one 'pruned' event.
+        """
+        broker = get_broker()
+        notification = Notifications.objects.create(employee=self.employee, action='created')
+        with self.captureOnCommitCallbacks(execute=True):
+            notification_id = notification.id
+            notification.delete()
+        self.assertEqual(broker.published[-1], {
+            'event': 'deleted', 'notification': {'id': notification_id, 'employee': self.employee.id},
+        })
+
+        old = [Notifications.objects.create(employee=self.employee, action='created') for _ in range(3)]
+        Notifications.objects.filter(id__in=[n.id for n in old]).update(timestamp=now() - timedelta(days=60))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(Notifications.objects.prune_expired(retention_days=30, batch_size=2), 3)
+        self.assertEqual(broker.published[-1]['event'], 'pruned')
+        self.assertIn('before', broker.published[-1]['notification'])
+
+    def test_bulk_actions_and_imports_are_published(self):
+        """
+        Test bulk notification actions and imported bookings, which skip post_save, still publish.
+        """
+        broker = get_broker()
+        Service.objects.create(name='service_1', price=150.00)
+        admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        notifications = [Notifications.objects.create(employee=self.employee, action='created') for _ in range(2)]
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('bulk-notification-action'),
+                {'ids': [n.id for n in notifications], 'action': 'approve'}, content_type='application/json',
+            )
+        self.assertEqual(
+            [(m['event'], m['notification']['id'], m['notification']['status']) for m in broker.published[-2:]],
+            [('updated', n.id, 'approved') for n in notifications],
+        )
+
+        row = {
+            'client_email': 'jane@example.com', 'client_first_name': 'Jane', 'client_last_name': 'Roe',
+            'client_phone': '555', 'employee': self.employee.id, 'service': 'service_1',
+            'date': '2025-03-01', 'time': '10:00', 'end_time': '12:00', 'price': '200.00',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            import_appointments([row], self.employee)
+        self.assertEqual(broker.published[-1]['event'], 'created')
+        self.assertEqual(broker.published[-1]['notification']['appointment_details']['client'], 'Jane Roe')
+
+    def test_stream_requires_asgi(self):
+        """
+        Test the stream is refused under WSGI instead of holding a worker open.
+        """
+        admin = User.objects.create(username='admin', role='admin')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('notification-stream'))
+        self.assertEqual(response.status_code, 501)
@@ -0,0 +1,109 @@
+from datetime import date, time, timedelta
+
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+from django.utils.timezone import now
+
+from core.models import User, ClientProfile, Service, Appointment, Notifications
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Base class for EXPLAIN-based index checks. Subclasses seed enough rows for the
+    planner to prefer an index, and tables are ANALYZEd before each plan is read.
+    """
+    # Plan fragments that mean a full table scan, per backend
+    full_scan_markers = {
+        "sqlite": "SCAN {table}",
+        "postgresql": "Seq Scan on {table}",
+    }
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name, table):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Expected {index_name} in plan:\n{plan}")
+        marker = self.full_scan_markers.get(connection.vendor)
+        if marker:
+            # "SCAN core_appointment" must not match "SCAN core_appointment USING INDEX ..."
+            full_scans = [
+                line for line in plan.splitlines()
+                if marker.format(table=table) in line and "INDEX" not in line.upper()
+            ]
+            self.assertEqual(full_scans, [], f"Unexpected full scan of {table}:\n{plan}")
+
+
+class HotQueryIndexTest(QueryPlanTestCase):
+    """
+    Test the hot appointment and notification queries are answered from an index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = [User.objects.create(username=f'artist{i}') for i in range(5)]
+        services = [Service.objects.create(name=f'service_{i}', price=100) for i in (1, 2, 3)]
+        clients = [
+            ClientProfile.objects.create(first_name='C', last_name=str(i), email=f'c{i}@example.com', phone='555')
+            for i in range(50)
+        ]
+        statuses = ['confirmed', 'completed', 'completed', 'pending', 'canceled']
+        # Eight bookings a day across five artists for about a year, without overlaps per artist
+        Appointment.objects.bulk_create([
+            Appointment(
+                client=clients[n % len(clients)],
+                employee=cls.employees[n % 5],
+                service=services[n % 3],
+                date=date(2025, 1, 1) + timedelta(days=n // 8),
+                time=time(9 + n % 8, 0),
+                end_time=time(10 + n % 8, 0),
+                price=100,
+                status=statuses[n % 5],
+            )
+            for n in range(3000)
+        ])
+        cls.appointment = Appointment.objects.order_by('id').first()
+        Notifications.objects.bulk_create([
+            Notifications(
+                employee=appointment.employee,
+                appointment=appointment,
+                action=('created', 'updated')[i % 2],
+                status=('pending', 'approved', 'denied')[i % 3],
+            )
+            for i, appointment in enumerate(Appointment.objects.order_by('id')[:600])
+        ])
+
+    def test_employee_listing_uses_employee_date_index(self):
+        """Test AppointmentListView's per-employee scope uses (employee, date, time)."""
+        queryset = Appointment.objects.for_listing().filter(
+            employee=self.employees[0], date__gte=date(2025, 6, 1)
+        ).order_by('date', 'time', 'id')
+        self.assertUsesIndex(queryset, 'core_appt_emp_date_time_idx', 'core_appointment')
+
+    def test_completed_range_uses_partial_index(self):
+        """Test completed-only metrics over a date range use the partial completed index."""
+        queryset = Appointment.objects.filter(
+            status='completed', date__range=[date(2025, 3, 1), date(2025, 3, 31)]
+        ).values('client').distinct()
+        self.assertUsesIndex(queryset, 'core_appt_completed_date_idx', 'core_appointment')
+
+        series = Appointment.objects.filter(
+            status='completed', date__range=[date(2025, 3, 1), date(2025, 3, 31)]
+        ).values('date').annotate(clients=Count('client', distinct=True))
+        self.assertUsesIndex(series, 'core_appt_completed_date_idx', 'core_appointment')
+
+    def test_pending_request_lookup_uses_partial_index(self):
+        """Test RescheduleAppointmentView's open-request lookup uses the pending notification index."""
+        queryset = Notifications.objects.filter(
+            appointment=self.appointment, employee=self.appointment.employee, action='updated', status='pending'
+        )
+        self.assertUsesIndex(queryset, 'core_notif_pending_idx', 'core_notifications')
+
+    def test_recent_activity_uses_timestamp_index(self):
+        """Test the recent activity feed reads newest-first from the (timestamp, id) index."""
+        queryset = Notifications.objects.for_feed().filter(
+            timestamp__gte=now() - timedelta(days=1)
+        ).order_by('-timestamp', '-id')
+        self.assertUsesIndex(queryset, 'core_notif_timestamp_id_idx', 'core_notifications')
@@ -1,5 +1,5 @@
 from django.test import TestCase
-from core.models import User, ClientProfile, Service, Appointment, Notifications
+from core.models import User, ClientProfile, Service, Appointment, Notifications, RecurrenceRule
 from datetime import date, time
 from django.core.exceptions import ValidationError
 
@@ -157,3 +157,30 @@ class NotificationsModelTest(TestCase):
             str(self.notification),
             f"Notification from {self.notification.employee} - {self.notification.action} ({self.notification.status})"
         )
+
+
+class RecurrenceRuleModelTest(TestCase):
+
+    def setUp(self):
+        employee = User.objects.create(username='artist')
+        client = ClientProfile.objects.create(first_name='John', last_name='Doe', email='john@example.com', phone='555')
+        service = Service.objects.create(name='service_1', price=150.00)
+        self.appointment = Appointment.objects.create(
+            client=client, employee=employee, service=service, date=date(2025, 1, 31),
+            time=time(10, 0), end_time=time(12, 0), price=150.00
+        )
+
+    def test_monthly_series_skips_short_months(self):
+        """Test a monthly series on the 31st skips months without one and records its last date."""
+        rule = RecurrenceRule.objects.create(appointment=self.appointment, frequency='monthly', count=3)
+        self.assertEqual(list(rule.occurrence_dates()), [date(2025, 1, 31), date(2025, 3, 31), date(2025, 5, 31)])
+        self.assertEqual(rule.ends_on, date(2025, 5, 31))
+
+    def test_open_ended_series_expands_window_only(self):
+        """Test an open-ended series yields only the dates inside the requested window."""
+        rule = RecurrenceRule.objects.create(appointment=self.appointment, frequency='weekly', interval=2)
+        self.assertIsNone(rule.ends_on)
+        self.assertEqual(
+            list(rule.occurrence_dates(date(2026, 1, 1), date(2026, 1, 31))),
+            [date(2026, 1, 2), date(2026, 1, 16), date(2026, 1, 30)],
+        )
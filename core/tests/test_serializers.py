@@ -1,4 +1,8 @@
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from core.models import User, ClientProfile, Service, Appointment, Notifications
 from core.serializers import (
     UserSerializer,
@@ -8,6 +12,7 @@ from core.serializers import (
     NotificationSerializer
 )
 from datetime import date, time
+from rest_framework.exceptions import ValidationError
 from django.utils.timezone import localtime
 
 class UserSerializerTest(TestCase):
@@ -251,3 +256,128 @@ class NotificationSerializerTest(TestCase):
         serializer = NotificationSerializer(data=data)
         self.assertFalse(serializer.is_valid())
         self.assertIn('status', serializer.errors)
+
+
+class AppointmentOverlapTest(TestCase):
+    """
+    Test the double-booking check in AppointmentSerializer.
+    """
+
+    def setUp(self):
+        """
+        Set up an employee with one confirmed appointment from 12:00 to 14:00.
+        """
+        self.employee = User.objects.create(username='employee')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.appointment = Appointment.objects.create(
+            client=self.client_profile, employee=self.employee, service=self.service,
+            date=date(2025, 3, 1), time=time(12, 0), end_time=time(14, 0), price=150.00
+        )
+
+    def _serializer(self, start, end, instance=None, **extra):
+        data = {
+            'client_id': self.client_profile.id,
+            'employee': self.employee.id,
+            'service': 'service_1',
+            'date': '2025-03-01',
+            'time': start,
+            'end_time': end,
+            'price': '150.00',
+            **extra,
+        }
+        return AppointmentSerializer(instance, data=data, partial=instance is not None)
+
+    def test_overlapping_booking_is_rejected(self):
+        """
+        Test a booking that overlaps an active appointment is invalid.
+        """
+        serializer = self._serializer('13:00', '15:00')
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('time', serializer.errors)
+
+    def test_adjacent_and_canceled_bookings_are_allowed(self):
+        """
+        Test back-to-back bookings are valid, and canceled appointments do not block the slot.
+        """
+        self.assertTrue(self._serializer('14:00', '16:00').is_valid())
+        self.appointment.status = 'canceled'
+        self.appointment.save()
+        self.assertTrue(self._serializer('13:00', '15:00').is_valid())
+
+    def test_rescheduling_does_not_conflict_with_itself(self):
+        """
+        Test moving an appointment within its own slot is valid.
+        """
+        serializer = self._serializer('12:30', '14:00', instance=self.appointment)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+
+class NewClientUpsertTest(TestCase):
+    """
+    Test booking with new_client details reuses or creates the client in one statement.
+    """
+
+    def setUp(self):
+        """
+        Set up an employee and an existing client.
+        """
+        self.employee = User.objects.create(username='employee')
+        Service.objects.create(name='service_1', price=150.00)
+        self.existing = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='John.Doe@Example.com', phone='1234567890'
+        )
+
+    def _book(self, email, hour):
+        serializer = AppointmentSerializer(data={
+            'new_client': {
+                'first_name': 'Johnny', 'last_name': 'D', 'email': email, 'phone': '555', 'employee': self.employee.id,
+            },
+            'employee': self.employee.id, 'service': 'service_1', 'date': '2025-03-01',
+            'time': f'{hour}:00', 'end_time': f'{hour + 1}:00', 'price': '150.00',
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.save()
+
+    def test_existing_email_reuses_stored_client(self):
+        """
+        Test an email differing only by case books for the stored client, keeping its details.
+        """
+        self.assertEqual(self.existing.email, 'john.doe@example.com')
+        with CaptureQueriesContext(connection) as queries:
+            appointment = self._book(' JOHN.doe@example.com ', 10)
+        self.assertEqual(appointment.client.pk, self.existing.pk)
+        self.assertEqual(appointment.client.first_name, 'John')
+        self.assertEqual(ClientProfile.objects.count(), 1)
+        client_writes = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "core_clientprofile"')]
+        self.assertEqual(len(client_writes), 1)
+
+    def test_new_email_creates_client(self):
+        """
+        Test an unknown email creates the client and books for it.
+        """
+        appointment = self._book('jane@example.com', 12)
+        self.assertEqual(appointment.client.email, 'jane@example.com')
+        self.assertEqual(ClientProfile.objects.get(email='jane@example.com').pk, appointment.client.pk)
+
+    def test_rejected_booking_leaves_no_new_client(self):
+        """
+        Test a booking rejected by the overlap constraint rolls back the client it would have created.
+        """
+        error = IntegrityError(f'conflicting key value violates exclusion constraint "{Appointment.NO_OVERLAP_CONSTRAINT}"')
+        with patch.object(Appointment.objects, 'create', side_effect=error):
+            with self.assertRaises(ValidationError):
+                self._book('jane@example.com', 12)
+        self.assertFalse(ClientProfile.objects.filter(email='jane@example.com').exists())
+
+    def test_client_profile_email_is_unique_ignoring_case(self):
+        """
+        Test the client serializer rejects an email that only differs by case.
+        """
+        serializer = ClientProfileSerializer(data={
+            'first_name': 'J', 'last_name': 'D', 'email': 'JOHN.DOE@example.com', 'phone': '1', 'employee': self.employee.id,
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('email', serializer.errors)
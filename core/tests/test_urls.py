@@ -83,3 +83,87 @@ class UrlsTest(SimpleTestCase):
         """
         url = reverse('decline-notification', kwargs={'pk': 1})
         self.assertEqual(resolve(url).func.view_class, views.DeclineNotificationView)
+
+    def test_appointment_export_url(self):
+        """
+        Test the appointment export URL resolves correctly.
+        """
+        url = reverse('appointment-export')
+        self.assertEqual(resolve(url).func.view_class, views.AppointmentExportView)
+
+    def test_billing_export_url(self):
+        """
+        Test the billing export URL resolves correctly.
+        """
+        url = reverse('billing-export')
+        self.assertEqual(resolve(url).func.view_class, views.BillingExportView)
+
+    def test_availability_url(self):
+        """
+        Test the availability URL resolves correctly.
+        """
+        url = reverse('availability')
+        self.assertEqual(resolve(url).func.view_class, views.AvailabilityView)
+
+    def test_appointment_changes_url(self):
+        """
+        Test the appointment changes URL resolves correctly.
+        """
+        url = reverse('appointment-changes')
+        self.assertEqual(resolve(url).func.view_class, views.AppointmentChangesView)
+
+    def test_notification_stream_url(self):
+        """
+        Test the notification stream URL resolves correctly.
+        """
+        url = reverse('notification-stream')
+        self.assertEqual(resolve(url).func.view_class, views.NotificationStreamView)
+
+    def test_bulk_notification_action_url(self):
+        """
+        Test the bulk notification action URL resolves correctly.
+        """
+        url = reverse('bulk-notification-action')
+        self.assertEqual(resolve(url).func.view_class, views.BulkNotificationActionView)
+
+    def test_appointment_bulk_create_url(self):
+        """
+        Test the appointment bulk create URL resolves correctly.
+        """
+        url = reverse('appointment-bulk-create')
+        self.assertEqual(resolve(url).func.view_class, views.AppointmentBulkCreateView)
+
+    def test_appointment_recurrence_url(self):
+        """
+        Test the appointment recurrence URL resolves correctly.
+        """
+        url = reverse('appointment-recurrence', kwargs={'pk': 1})
+        self.assertEqual(resolve(url).func.view_class, views.AppointmentRecurrenceView)
+
+    def test_series_occurrence_url(self):
+        """
+        Test the series occurrence URL resolves correctly.
+        """
+        url = reverse('series-occurrence', kwargs={'series_pk': 1, 'occurrence_date': '2025-03-01'})
+        self.assertEqual(resolve(url).func.view_class, views.SeriesOccurrenceView)
+
+    def test_metrics_series_url(self):
+        """
+        Test the metrics series URL resolves correctly.
+        """
+        url = reverse('metrics-series')
+        self.assertEqual(resolve(url).func.view_class, views.MetricsSeriesView)
+
+    def test_client_search_url(self):
+        """
+        Test the client search URL resolves correctly.
+        """
+        url = reverse('client-search')
+        self.assertEqual(resolve(url).func.view_class, views.ClientSearchView)
+
+    def test_search_url(self):
+        """
+        Test the full-text search URL resolves correctly.
+        """
+        url = reverse('search')
+        self.assertEqual(resolve(url).func.view_class, views.SearchView)
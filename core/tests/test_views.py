@@ -1,9 +1,22 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+from django.core import signing
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import now
 from rest_framework.test import APIClient
 from rest_framework import status
-from core.models import User, ClientProfile, Service, Appointment, Notifications
-from datetime import date, time
+from core import caching
+from core.caching import invalidate_service_catalog
+from core import client_index
+from core.client_index import invalidate_client_index
+from core.models import User, ClientProfile, Service, Appointment, DailyRevenue, Notifications, RecurrenceRule
+from datetime import date, time, timedelta
+from unittest.mock import patch
 
 
 class UserViewTest(TestCase):
@@ -187,3 +200,1355 @@ class NotificationViewTest(TestCase):
 
         response = self.client.post(f'/api/recent-activity/{self.notification1.id}/approve/')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentListQueryCountTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='adminuser', password='testpass', role='admin')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client.force_authenticate(user=self.admin)
+
+    def _create_appointments(self, count):
+        for i in range(count):
+            artist = User.objects.create(
+                username=f'artist{ClientProfile.objects.count()}', first_name='Art', last_name=str(i)
+            )
+            client_profile = ClientProfile.objects.create(
+                first_name='John',
+                last_name=str(i),
+                email=f'client{ClientProfile.objects.count()}@example.com',
+                phone='1234567890',
+                employee=artist
+            )
+            Appointment.objects.create(
+                client=client_profile,
+                employee=artist,
+                service=self.service,
+                date=date.today(),
+                time=time(10, 0),
+                end_time=time(12, 0),
+                price=150.00,
+            )
+
+    def test_appointment_list_query_count_is_constant(self):
+        """Test the appointment list view issues the same number of queries for 1 or 20 rows."""
+        self._create_appointments(1)
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.get(reverse('appointment-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_appointments(19)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('appointment-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_appointment_list_keyset_pagination(self):
+        """Test the appointment list pages through rows in (date, time, id) order without gaps."""
+        self._create_appointments(5)
+        seen = []
+        url = reverse('appointment-list') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, sorted(Appointment.objects.values_list('id', flat=True)))
+
+    def test_appointment_list_conditional_get(self):
+        """Test the list returns 304 for an unchanged scope and 200 after an edit or delete."""
+        self._create_appointments(2)
+        etag = self.client.get(reverse('appointment-list'))['ETag']
+        response = self.client.get(reverse('appointment-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        appointment = Appointment.objects.first()
+        appointment.notes = 'Moved to the back room.'
+        appointment.save()
+        response = self.client.get(reverse('appointment-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        Appointment.objects.last().delete()
+        response = self.client.get(reverse('appointment-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_appointment_list_etag_tracks_related_rows(self):
+        """Test renaming a listed appointment's client or employee invalidates the list's ETag."""
+        self._create_appointments(2)
+        appointment = Appointment.objects.select_related('client', 'employee').first()
+        for related in (appointment.client, appointment.employee):
+            etag = self.client.get(reverse('appointment-list'))['ETag']
+            related.last_name = 'Renamed'
+            related.save()
+            response = self.client.get(reverse('appointment-list'), HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_appointment_list_rejects_invalid_cursor(self):
+        """Test a malformed or tampered cursor returns 404 instead of a server error."""
+        response = self.client.get(reverse('appointment-list') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for position in (['garbage', 'x', 1], ['2025-01-01', '10:00:00', 'x'], ['2025-01-01', None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(reverse('appointment-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, position)
+
+
+class AppointmentListFilterTest(TestCase):
+    """
+    Test the appointment list's status, service, client, approval and date filters and ordering.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.artist = User.objects.create(username='artist', role='employee')
+        services = [Service.objects.create(name=name, price=100.00) for name in ('service_1', 'service_2')]
+        self.clients = [
+            ClientProfile.objects.create(first_name='C', last_name=str(i), email=f'c{i}@example.com', phone='555')
+            for i in range(2)
+        ]
+        self.start = date.today() + timedelta(days=1)
+        self.appointments = [
+            Appointment.objects.create(
+                client=self.clients[i % 2], employee=self.artist, service=services[i % 2],
+                date=self.start + timedelta(days=i), time=time(10, 0), end_time=time(11, 0), price=100.00,
+                status=('confirmed', 'pending', 'canceled', 'confirmed')[i], requires_approval=(i == 1),
+            )
+            for i in range(4)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def _ids(self, params):
+        response = self.client.get(reverse('appointment-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_filters_are_combined(self):
+        """Test status accepts several values and every filter narrows the same query."""
+        a = self.appointments
+        self.assertEqual(self._ids({'status': 'pending,canceled'}), [a[1].id, a[2].id])
+        self.assertEqual(self._ids({'status': ['confirmed', 'pending'], 'service': 'service_1'}), [a[0].id])
+        self.assertEqual(self._ids({'client': self.clients[1].id}), [a[1].id, a[3].id])
+        self.assertEqual(self._ids({'requires_approval': 'true'}), [a[1].id])
+        self.assertEqual(self._ids({'date_to': (self.start + timedelta(days=1)).isoformat()}), [a[0].id, a[1].id])
+        window = {'date_from': self.start.isoformat(), 'date_to': (self.start + timedelta(days=6)).isoformat()}
+        self.assertEqual(self._ids({**window, 'status': 'confirmed'}), [a[0].id, a[3].id])
+
+    def test_ordering_descending_pages(self):
+        """Test ordering=-date lists newest first and the cursor keeps that direction."""
+        seen = []
+        params = {'ordering': '-date', 'page_size': 3}
+        response = self.client.get(reverse('appointment-list'), params)
+        seen.extend(row['id'] for row in response.data['results'])
+        response = self.client.get(response.data['next'])
+        seen.extend(row['id'] for row in response.data['results'])
+        self.assertEqual(seen, [appointment.id for appointment in reversed(self.appointments)])
+
+    def test_window_occurrences_follow_filters(self):
+        """Test expanded recurring occurrences are filtered like stored rows."""
+        rule = RecurrenceRule.objects.create(appointment=self.appointments[0], frequency='daily', count=3)
+        Appointment.objects.filter(pk=self.appointments[0].pk).update(series=rule, occurrence_date=self.start)
+        window = {'date_from': self.start.isoformat(), 'date_to': (self.start + timedelta(days=6)).isoformat()}
+        response = self.client.get(reverse('appointment-list'), {**window, 'client': self.clients[0].id})
+        self.assertEqual(len(response.data['results']), 4)
+        response = self.client.get(reverse('appointment-list'), {**window, 'client': self.clients[1].id})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_filters_are_rejected(self):
+        """Test unknown or malformed filter values return 400."""
+        for params in (
+            {'status': 'confirmed,lost'}, {'service': 'service_9'}, {'client': 'abc'}, {'employee': 'abc'},
+            {'requires_approval': 'maybe'}, {'ordering': 'price'}, {'date_from': '2025-02-30'},
+        ):
+            response = self.client.get(reverse('appointment-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn(next(iter(params)), response.data)
+
+
+class AppointmentOverviewViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='adminuser', role='admin')
+        self.other_artist = User.objects.create(username='otherartist', first_name='Other', last_name='Artist')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        for hour, (artist, appt_status) in enumerate([
+            (self.admin, 'confirmed'), (self.admin, 'completed'), (self.admin, 'canceled'),
+            (self.other_artist, 'completed'), (self.other_artist, 'no_show'),
+        ], start=10):
+            Appointment.objects.create(
+                client=self.client_profile, employee=artist, service=self.service,
+                date=date.today(), time=time(hour, 0), end_time=time(hour + 1, 0), price=150.00, status=appt_status
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_overview_counts_in_one_query(self):
+        """Test all status counts, including confirmed, come from a single query."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('appointment-overview'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'total': 5, 'pending': 0, 'confirmed': 1, 'completed': 2, 'canceled': 1, 'no_show': 1,
+        })
+        appointment_queries = [q for q in queries.captured_queries if 'core_appointment' in q['sql']]
+        self.assertEqual(len(appointment_queries), 1)
+
+    def test_overview_group_by_employee(self):
+        """Test the per-employee breakdown matches the shop totals."""
+        response = self.client.get(reverse('appointment-overview') + '?group_by=employee')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 5)
+        by_employee = {row['employee']: row for row in response.data['by_employee']}
+        self.assertEqual(by_employee[self.admin.id]['total'], 3)
+        self.assertEqual(by_employee[self.other_artist.id]['completed'], 1)
+        self.assertEqual(by_employee[self.other_artist.id]['employee_name'], 'Other Artist')
+
+    def test_overview_rejects_unknown_group_by(self):
+        """Test an unsupported group_by value returns 400."""
+        response = self.client.get(reverse('appointment-overview') + '?group_by=service')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BillingSummaryViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='adminuser', role='admin', is_staff=True)
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _add_artist(self, sessions):
+        artist = User.objects.create(username=f'artist{User.objects.count()}')
+        for day in range(1, sessions + 1):
+            Appointment.objects.create(
+                client=self.client_profile, employee=artist, service=self.service,
+                date=date(2025, 3, day), time=time(10, 0), end_time=time(12, 0), price=200, status='completed'
+            )
+        return artist
+
+    def _summary(self):
+        return self.client.post(
+            reverse('billing-summary'),
+            {'month': 3, 'year': 2025, 'fee_type': 'percentage', 'fee_value': 25},
+            format='json'
+        )
+
+    def test_billing_summary_totals(self):
+        """Test per-employee totals, fees and appointment detail."""
+        artist = self._add_artist(2)
+        response = self._summary()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['shop_total_revenue'], 400.0)
+        self.assertEqual(response.data['shop_total_appointments'], 2)
+        self.assertEqual(response.data['shop_total_earnings'], 100.0)
+        report = response.data['report'][0]
+        self.assertEqual(report['employee_id'], artist.id)
+        self.assertEqual(report['net_payout'], 300.0)
+        self.assertEqual(
+            report['appointments'][0],
+            {'client_name': 'John Doe', 'date': '2025-03-01', 'price': 200.0, 'shop_cut': 50.0, 'artist_cut': 150.0}
+        )
+
+    def test_billing_summary_query_count_independent_of_employees(self):
+        """Test the summary issues the same number of queries for 1 or 5 employees."""
+        self._add_artist(3)
+        with CaptureQueriesContext(connection) as one_employee:
+            self._summary()
+
+        for _ in range(4):
+            self._add_artist(3)
+        with CaptureQueriesContext(connection) as five_employees:
+            response = self._summary()
+
+        self.assertEqual(len(response.data['report']), 5)
+        self.assertEqual(len(one_employee.captured_queries), len(five_employees.captured_queries))
+
+    def test_billing_summary_ignores_rows_completed_mid_report(self):
+        """Test an appointment completed between the totals and detail queries is skipped, not a 500."""
+        self._add_artist(1)
+        late = []
+
+        def complete_after_totals(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if 'SUM(' in sql and not late:
+                late.append(sql)
+                self._add_artist(1)
+            return result
+
+        with connection.execute_wrapper(complete_after_totals):
+            response = self._summary()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Appointment.objects.count(), 2)
+        self.assertEqual(len(response.data['report']), 1)
+        self.assertEqual(response.data['shop_total_appointments'], 1)
+
+    def test_billing_summary_requires_fee(self):
+        """Test a missing fee returns 400 with an error message."""
+        response = self.client.post(reverse('billing-summary'), {'month': 3, 'year': 2025}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Missing fee_type or fee_value.')
+
+
+class ExportViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='adminuser', role='admin', is_staff=True)
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        for day in (1, 2):
+            Appointment.objects.create(
+                client=self.client_profile, employee=self.admin, service=self.service,
+                date=date(2025, 3, day), time=time(10, 0), end_time=time(12, 0), price=200,
+                status='completed', notes='Forearm, "fine line"'
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_appointment_export_csv(self):
+        """Test the appointment export streams a CSV header plus one line per row."""
+        response = self.client.get(reverse('appointment-export') + '?date_from=2025-03-02')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,date,time'))
+        self.assertIn('"Forearm, ""fine line"""', lines[1])
+
+    def test_billing_export_ndjson(self):
+        """Test the billing export streams one JSON object per completed appointment."""
+        response = self.client.get(
+            reverse('billing-export'),
+            {'month': 3, 'year': 2025, 'fee_type': 'flat', 'fee_value': 50, 'export_format': 'ndjson'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['client_name'], 'John Doe')
+        self.assertEqual(rows[0]['shop_cut'], '50')
+        self.assertEqual(rows[0]['artist_cut'], '150.00')
+
+    def test_exports_validate_params(self):
+        """Test malformed dates and ids return 400 and the filename is built from parsed dates."""
+        fees = {'fee_type': 'flat', 'fee_value': 50}
+        for params in (
+            {'start_date': 'x', 'end_date': '2025-03-31'},
+            {'start_date': '2025-03-01', 'end_date': '2025-03-31"\r\nSet-Cookie: a=b'},
+        ):
+            response = self.client.get(reverse('billing-export'), {**params, **fees})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+        response = self.client.get(reverse('billing-export'), {'start_date': '2025-03-01', 'end_date': '2025-03-31', **fees})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="billing_2025-03-01_2025-03-31.csv"')
+
+        response = self.client.get(reverse('appointment-export'), {'employee': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee', response.data)
+
+    def test_export_rejects_unknown_format(self):
+        """Test an unsupported export_format returns 400."""
+        response = self.client.get(reverse('appointment-export') + '?export_format=xlsx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AvailabilityViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.artist = User.objects.create(username='artist', first_name='Ink', last_name='Artist')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.day = date.today() + timedelta(days=30)
+        for start, end, appt_status in [(11, 13, 'confirmed'), (13, 14, 'pending'), (12, 18, 'canceled')]:
+            Appointment.objects.create(
+                client=self.client_profile, employee=self.artist, service=self.service, date=self.day,
+                time=time(start, 0), end_time=time(end, 0), price=150.00, status=appt_status
+            )
+        self.client.force_authenticate(user=self.artist)
+
+    def test_availability_skips_booked_and_short_gaps(self):
+        """Test back-to-back bookings merge, canceled ones are ignored and short gaps are dropped."""
+        response = self.client.get(reverse('availability'), {
+            'employee': self.artist.id, 'duration': 120, 'start': self.day.isoformat(), 'end': self.day.isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        artist = response.data['availability'][0]
+        self.assertEqual(artist['employee_name'], 'Ink Artist')
+        self.assertEqual(artist['slots'], [{'date': self.day.isoformat(), 'start': '14:00', 'end': '20:00'}])
+
+    def test_availability_ignores_time_after_closing(self):
+        """Test a booking running past closing does not stretch the last free slot beyond closing."""
+        Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service, date=self.day,
+            time=time(19, 0), end_time=time(22, 0), price=150.00
+        )
+        response = self.client.get(reverse('availability'), {
+            'employee': self.artist.id, 'duration': 60, 'start': self.day.isoformat(), 'end': self.day.isoformat(),
+        })
+        self.assertEqual(response.data['availability'][0]['slots'], [
+            {'date': self.day.isoformat(), 'start': '10:00', 'end': '11:00'},
+            {'date': self.day.isoformat(), 'start': '14:00', 'end': '19:00'},
+        ])
+
+        # Entirely after closing: the day still ends at closing time
+        Appointment.objects.filter(time=time(19, 0)).update(time=time(21, 0))
+        response = self.client.get(reverse('availability'), {
+            'employee': self.artist.id, 'duration': 60, 'start': self.day.isoformat(), 'end': self.day.isoformat(),
+        })
+        self.assertEqual(response.data['availability'][0]['slots'][-1], {
+            'date': self.day.isoformat(), 'start': '14:00', 'end': '20:00',
+        })
+
+    def test_availability_validates_window(self):
+        """Test a missing duration or an oversized window returns 400."""
+        response = self.client.get(reverse('availability'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('availability'), {
+            'duration': 60, 'start': '2025-01-01', 'end': '2025-06-01',
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('availability'), {'duration': 60, 'employee': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee', response.data)
+
+
+class ServiceCatalogCacheTest(TestCase):
+
+    def setUp(self):
+        invalidate_service_catalog()
+        self.client = APIClient()
+        self.user = User.objects.create(username='employee')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client.force_authenticate(user=self.user)
+
+    def test_service_list_revalidates_without_queries(self):
+        """Test a matching If-None-Match gets 304 without any database query, cache table included."""
+        response = self.client.get(reverse('service-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['name'], 'service_1')
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('service-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_other_worker_change_is_seen_after_local_ttl(self):
+        """Test a version rotated by another process is picked up once the local copy's TTL runs out."""
+        etag = self.client.get(reverse('service-list'))['ETag']
+        # Another worker saved a service: the shared version moves, this process's copy does not
+        Service.objects.filter(pk=self.service.pk).update(price=175)
+        cache.set(caching.SERVICE_CATALOG_VERSION_KEY, 'rotated-elsewhere', timeout=None)
+        cache.delete(caching.SERVICE_CATALOG_KEY)
+
+        response = self.client.get(reverse('service-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        caching._local['checked'] -= caching.LOCAL_TTL
+        response = self.client.get(reverse('service-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['price'], '175.00')
+
+    def test_service_change_invalidates_catalog(self):
+        """Test saving a service rotates the ETag and refreshes the cached list."""
+        etag = self.client.get(reverse('service-list'))['ETag']
+        self.service.price = 175
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+
+        response = self.client.get(reverse('service-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data[0]['price'], '175.00')
+
+    def test_rolled_back_service_change_keeps_catalog(self):
+        """Test a service write that rolls back does not rotate the catalog version."""
+        etag = self.client.get(reverse('service-list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.service.price = 175
+                    self.service.save()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(callbacks, [])
+        response = self.client.get(reverse('service-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class AppointmentChangesViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.artist = User.objects.create(username='artist')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.appointments = [self._book(hour) for hour in (10, 12, 14)]
+        Appointment.objects.update(updated_at=now() - timedelta(hours=1))
+        self.client.force_authenticate(user=self.artist)
+
+    def _book(self, hour):
+        return Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service,
+            date=date.today() + timedelta(days=1), time=time(hour, 0), end_time=time(hour + 1, 0), price=150.00
+        )
+
+    def test_changes_since_token(self):
+        """Test a sync with a token returns only edited/new rows and deleted ids."""
+        response = self.client.get(reverse('appointment-changes'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['changed']), 3)
+        token = response.data['token']
+
+        edited, deleted, _ = self.appointments
+        edited.notes = 'Bring reference photos.'
+        edited.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        created = self._book(16)
+
+        response = self.client.get(reverse('appointment-changes'), {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['id'] for row in response.data['changed']], [edited.id, created.id])
+        self.assertEqual(response.data['deleted'], [deleted_id])
+
+    def test_changes_rejects_tampered_token(self):
+        """Test an invalid token returns 400."""
+        response = self.client.get(reverse('appointment-changes'), {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_changes_report_reassignment_as_removal(self):
+        """Test an appointment moved to another employee is deleted from the old feed and changed in the new one."""
+        admin = User.objects.create(username='admin', role='admin')
+        other = User.objects.create(username='other')
+        token = self.client.get(reverse('appointment-changes')).data['token']
+
+        moved = self.appointments[0]
+        moved.employee = other
+        moved.save()
+
+        response = self.client.get(reverse('appointment-changes'), {'since': token})
+        self.assertEqual(response.data['changed'], [])
+        self.assertEqual(response.data['deleted'], [moved.id])
+
+        self.client.force_authenticate(user=other)
+        response = self.client.get(reverse('appointment-changes'), {'since': token})
+        self.assertEqual([row['id'] for row in response.data['changed']], [moved.id])
+        self.assertEqual(response.data['deleted'], [])
+
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('appointment-changes'), {'since': token})
+        self.assertEqual([row['id'] for row in response.data['changed']], [moved.id])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_changes_validate_params(self):
+        """Test a non-numeric employee filter or a token older than tombstone retention returns 400."""
+        self.client.force_authenticate(user=User.objects.create(username='admin', role='admin'))
+        response = self.client.get(reverse('appointment-changes'), {'employee': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee', response.data)
+
+        expired = signing.dumps((now() - timedelta(days=31)).isoformat(), salt='core.appointment-changes')
+        response = self.client.get(reverse('appointment-changes'), {'since': expired})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('since', response.data)
+
+
+class SparseFieldsetTest(TestCase):
+    """
+    Test ?fields= and ?omit= trim the appointment and notification payloads and their queries.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.artist = User.objects.create(username='artist', role='employee', first_name='Art')
+        service = Service.objects.create(name='service_1', price=150.00)
+        client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.appointment = Appointment.objects.create(
+            client=client_profile, employee=self.artist, service=service, date=date.today(),
+            time=time(10, 0), end_time=time(12, 0), price=150.00, notes='Forearm'
+        )
+        Notifications.objects.create(
+            employee=self.artist, appointment=self.appointment, action='created', changes={'notes': 'Forearm'}
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _get(self, name, params, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name, **kwargs), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        selects = [q['sql'] for q in queries.captured_queries if 'FROM "core_' in q['sql']]
+        return response, selects[-1]
+
+    def test_appointment_fields_prune_joins_and_columns(self):
+        """Test a calendar grid payload loads no client, employee or service row and no notes."""
+        response, sql = self._get('appointment-list', {'fields': 'id,date,time,end_time,status'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'date', 'time', 'end_time', 'status'})
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"notes"', sql)
+
+        response, sql = self._get(
+            'appointment-detail', {'omit': 'client,notes'}, kwargs={'pk': self.appointment.pk}
+        )
+        self.assertNotIn('client', response.data)
+        self.assertEqual(response.data['employee_name'], 'Art')
+        self.assertNotIn('core_clientprofile', sql)
+
+    def test_notification_omit_prunes_json_and_details(self):
+        """Test omitting the JSON fields and appointment_details skips those columns and joins."""
+        response, sql = self._get('recent-activity', {'omit': 'changes,previous_details,appointment_details'})
+        row = response.data['results'][0]
+        self.assertNotIn('changes', row)
+        self.assertNotIn('appointment_details', row)
+        self.assertEqual(row['action'], 'created')
+        self.assertNotIn('"changes"', sql)
+        self.assertNotIn('core_appointment', sql)
+
+    def test_unknown_fields_are_rejected(self):
+        """Test naming a field the serializer does not render returns 400."""
+        for params in ({'fields': 'id,password'}, {'omit': 'new_client'}):
+            response = self.client.get(reverse('appointment-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(next(iter(params)), response.data)
+
+
+class RecentActivityQueryCountTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='adminuser', role='admin')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client.force_authenticate(user=self.admin)
+
+    def _create_notifications(self, count):
+        for _ in range(count):
+            n = Notifications.objects.count()
+            artist = User.objects.create(username=f'artist{n}', first_name='Art', last_name=str(n))
+            client_profile = ClientProfile.objects.create(
+                first_name='John', last_name=str(n), email=f'client{n}@example.com', phone='1234567890'
+            )
+            appointment = Appointment.objects.create(
+                client=client_profile, employee=artist, service=self.service, date=date.today(),
+                time=time(10, 0), end_time=time(12, 0), price=150.00
+            )
+            Notifications.objects.create(
+                employee=artist, appointment=appointment, action='created', changes={'notes': 'Forearm'}
+            )
+
+    def test_recent_activity_query_count_is_constant(self):
+        """Test the admin feed issues the same number of queries for 1 or 25 notifications."""
+        url = reverse('recent-activity') + '?page_size=1000'
+        self._create_notifications(1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        self._create_notifications(24)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(response.data['results'][0]['appointment_details']['client'], 'John 24')
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+    def test_recent_activity_etag_tracks_appointment(self):
+        """Test rescheduling or renaming the client of a notification's appointment invalidates the feed's ETag."""
+        self._create_notifications(2)
+        appointment = Notifications.objects.select_related('appointment__client').first().appointment
+        etag = self.client.get(reverse('recent-activity'))['ETag']
+        self.assertEqual(
+            self.client.get(reverse('recent-activity'), HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        appointment.time, appointment.end_time = time(14, 0), time(15, 0)
+        appointment.save()
+        response = self.client.get(reverse('recent-activity'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        appointment.client.first_name = 'Jack'
+        appointment.client.save()
+        response = self.client.get(reverse('recent-activity'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class BulkNotificationActionViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='adminuser', role='admin', is_staff=True)
+        self.artist = User.objects.create(username='artist')
+        self.service_1 = Service.objects.create(name='service_1', price=150.00)
+        self.service_2 = Service.objects.create(name='service_2', price=250.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.notifications = []
+        for hour in (10, 12, 14):
+            appointment = Appointment.objects.create(
+                client=self.client_profile, employee=self.artist, service=self.service_2, date=date(2025, 3, 1),
+                time=time(hour, 0), end_time=time(hour + 1, 0), price=250.00, requires_approval=True
+            )
+            self.notifications.append(Notifications.objects.create(
+                employee=self.artist, appointment=appointment, action='updated',
+                previous_details={'date': '2025-03-02', 'service': 'service_1', 'price': '150.00'}
+            ))
+        self.client.force_authenticate(user=self.admin)
+
+    def test_bulk_approve_reports_each_id(self):
+        """Test approving a batch confirms every appointment and reports unknown ids."""
+        ids = [n.id for n in self.notifications] + [9999]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('bulk-notification-action'), {'ids': ids, 'action': 'approve'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0], {'id': ids[0], 'status': 'approved'})
+        self.assertEqual(response.data['results'][-1], {'id': 9999, 'error': 'Not found.'})
+        self.assertEqual(Appointment.objects.filter(status='confirmed').count(), 3)
+        self.assertFalse(Notifications.objects.filter(previous_details__isnull=False).exists())
+        self.assertLess(len(queries.captured_queries), 12)
+
+    def test_bulk_decline_reverts_reschedules(self):
+        """Test declining a batch restores each appointment's previous details."""
+        response = self.client.post(
+            reverse('bulk-notification-action'),
+            {'ids': [n.id for n in self.notifications], 'action': 'decline'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        appointment = Appointment.objects.get(pk=self.notifications[0].appointment_id)
+        self.assertEqual(appointment.date, date(2025, 3, 2))
+        self.assertEqual(appointment.service, self.service_1)
+        self.assertEqual(appointment.status, 'confirmed')
+        self.assertEqual(set(Notifications.objects.values_list('status', flat=True)), {'denied'})
+
+    def _take_previous_slot(self):
+        # Someone books the 10:00 slot the first reschedule would revert to
+        return Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service_1, date=date(2025, 3, 2),
+            time=time(10, 30), end_time=time(11, 30), price=150.00
+        )
+
+    def test_decline_refuses_overlapping_revert(self):
+        """Test declining or deleting a reschedule whose old slot is now taken returns 409 and writes nothing."""
+        self._take_previous_slot()
+        notification = self.notifications[0]
+        for name, method in (('decline-notification', 'post'), ('delete-notification', 'delete')):
+            response = getattr(self.client, method)(reverse(name, args=[notification.id]))
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        appointment = Appointment.objects.get(pk=notification.appointment_id)
+        self.assertEqual(appointment.date, date(2025, 3, 1))
+        self.assertEqual(Notifications.objects.get(pk=notification.id).status, 'pending')
+
+    def test_decline_reports_constraint_race(self):
+        """Test a revert rejected by the database overlap constraint returns 409 instead of 500."""
+        error = IntegrityError(f'conflicting key value violates exclusion constraint "{Appointment.NO_OVERLAP_CONSTRAINT}"')
+        notification = self.notifications[0]
+        with patch.object(Appointment, 'save', side_effect=error):
+            response = self.client.post(reverse('decline-notification', args=[notification.id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Notifications.objects.get(pk=notification.id).status, 'pending')
+
+    def _rebook_after(self, status_):
+        # The first appointment drops out of the schedule and its slot is booked again
+        appointment = self.notifications[0].appointment
+        Appointment.objects.filter(pk=appointment.pk).update(status=status_)
+        Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service_1, date=appointment.date,
+            time=time(10, 0), end_time=time(11, 0), price=150.00
+        )
+        return appointment
+
+    def test_approve_refuses_reactivating_rebooked_slot(self):
+        """Test approving a canceled booking whose slot was rebooked returns 409, alone or in bulk."""
+        appointment = self._rebook_after('canceled')
+        response = self.client.post(reverse('approve-notification', args=[self.notifications[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'canceled')
+
+        ids = [n.id for n in self.notifications]
+        response = self.client.post(reverse('bulk-notification-action'), {'ids': ids, 'action': 'approve'}, format='json')
+        self.assertIn('error', response.data['results'][0])
+        self.assertEqual([r['status'] for r in response.data['results'][1:]], ['approved', 'approved'])
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'canceled')
+
+    def test_completing_rebooked_no_show_is_refused(self):
+        """Test marking a no-show completed after its slot was rebooked returns 409 instead of double-booking."""
+        appointment = self._rebook_after('no_show')
+        url = reverse('reschedule-appointment', args=[appointment.pk])
+        response = self.client.patch(url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'no_show')
+
+        other = self.notifications[1].appointment
+        response = self.client.patch(reverse('reschedule-appointment', args=[other.pk]), {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_approve_reports_constraint_race(self):
+        """Test an approval rejected by the database overlap constraint returns 409 instead of 500."""
+        error = IntegrityError(f'conflicting key value violates exclusion constraint "{Appointment.NO_OVERLAP_CONSTRAINT}"')
+        with patch.object(Appointment, 'save', side_effect=error):
+            response = self.client.post(reverse('approve-notification', args=[self.notifications[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(Notifications.objects.get(pk=self.notifications[0].id).status, 'pending')
+
+    def test_bulk_decline_skips_overlapping_reverts(self):
+        """Test a bulk decline reports reverts into a taken slot per id and applies the rest."""
+        self._take_previous_slot()
+        ids = [n.id for n in self.notifications]
+        response = self.client.post(reverse('bulk-notification-action'), {'ids': ids, 'action': 'decline'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('error', response.data['results'][0])
+        self.assertEqual([r['status'] for r in response.data['results'][1:]], ['denied', 'denied'])
+        self.assertEqual(Appointment.objects.get(pk=self.notifications[0].appointment_id).date, date(2025, 3, 1))
+        self.assertEqual(Appointment.objects.get(pk=self.notifications[1].appointment_id).date, date(2025, 3, 2))
+
+    def test_bulk_action_validates_input(self):
+        """Test an unknown action or malformed id list returns 400."""
+        url = reverse('bulk-notification-action')
+        response = self.client.post(url, {'ids': [1], 'action': 'archive'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(url, {'ids': 'all', 'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AppointmentBulkCreateViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.artist = User.objects.create(username='artist')
+        Service.objects.create(name='service_1', price=150.00)
+        self.client.force_authenticate(user=self.artist)
+
+    def _row(self, day, **extra):
+        return {
+            'client_email': 'jane@example.com', 'client_first_name': 'Jane', 'client_last_name': 'Roe',
+            'client_phone': '555', 'employee': self.artist.id, 'service': 'service_1',
+            'date': f'2025-03-{day:02d}', 'time': '10:00', 'end_time': '12:00', 'price': '200.00', **extra,
+        }
+
+    def test_bulk_create_uses_fixed_query_count(self):
+        """Test a batch is created with a fixed number of queries and notifies for employee bookings."""
+        rows = [self._row(day) for day in range(1, 21)] + [self._row(1, end_time='09:00')]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('appointment-bulk-create'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 20)
+        self.assertEqual(response.data['errors'][0]['row'], 20)
+        self.assertEqual(Notifications.objects.filter(action='created').count(), 20)
+        self.assertLess(len(queries.captured_queries), 15)
+
+    def test_bulk_create_marks_approval_rows_pending(self):
+        """Test rows flagged requires_approval are stored as pending, like Appointment.save()."""
+        response = self.client.post(
+            reverse('appointment-bulk-create'), [self._row(1, requires_approval=True)], format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Appointment.objects.get().status, 'pending')
+
+
+class RecurringSeriesViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.artist = User.objects.create(username='artist', role='employee')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.start = date.today() + timedelta(days=7)
+        self.template = Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service, date=self.start,
+            time=time(10, 0), end_time=time(12, 0), price=150.00
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def _window(self, days):
+        return {'date_from': self.start.isoformat(), 'date_to': (self.start + timedelta(days=days)).isoformat()}
+
+    def test_series_is_expanded_in_list_window(self):
+        """Test a weekly series is stored once and listed as one row per occurrence."""
+        response = self.client.post(
+            reverse('appointment-recurrence', kwargs={'pk': self.template.id}), {'frequency': 'weekly'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+        response = self.client.get(reverse('appointment-list'), {**self._window(27), 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dates = [row['date'] for row in response.data['results']]
+        self.assertEqual(dates, [(self.start + timedelta(weeks=n)).isoformat() for n in range(4)])
+        self.assertIsNone(response.data['results'][1]['id'])
+        self.assertEqual(response.data['results'][1]['series'], response.data['results'][0]['series'])
+
+    def test_series_rejects_clashing_occurrence(self):
+        """Test a series is refused when a later occurrence overlaps a stored booking."""
+        Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service,
+            date=self.start + timedelta(weeks=2), time=time(11, 0), end_time=time(13, 0), price=150.00
+        )
+        response = self.client.post(
+            reverse('appointment-recurrence', kwargs={'pk': self.template.id}), {'frequency': 'weekly'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RecurrenceRule.objects.exists())
+
+    def test_editing_occurrence_materializes_it(self):
+        """Test editing one occurrence stores it as its own row and it replaces the virtual one."""
+        rule = RecurrenceRule.objects.create(appointment=self.template, frequency='weekly', count=3)
+        Appointment.objects.filter(pk=self.template.pk).update(series=rule, occurrence_date=self.start)
+        second = self.start + timedelta(weeks=1)
+        url = reverse('series-occurrence', kwargs={'series_pk': rule.id, 'occurrence_date': second.isoformat()})
+
+        response = self.client.patch(url, {'time': '14:00', 'end_time': '16:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['occurrence_date'], second.isoformat())
+        self.assertEqual(self.client.patch(url, {}, format='json').status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.get(reverse('appointment-list'), self._window(30))
+        rows = [(row['date'], row['time']) for row in response.data['results']]
+        self.assertEqual(rows, [
+            (self.start.isoformat(), '10:00:00'),
+            (second.isoformat(), '14:00:00'),
+            ((self.start + timedelta(weeks=2)).isoformat(), '10:00:00'),
+        ])
+
+    def test_occurrences_block_bookings_and_availability(self):
+        """Test unstored occurrences count as bookings for overlap checks and availability."""
+        RecurrenceRule.objects.create(appointment=self.template, frequency='daily')
+        day = self.start + timedelta(days=3)
+        response = self.client.post(reverse('appointment-list'), {
+            'client_id': self.client_profile.id, 'employee': self.artist.id, 'service': 'service_1',
+            'date': day.isoformat(), 'time': '11:00', 'end_time': '13:00', 'price': '150.00',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('availability'), {
+            'employee': self.artist.id, 'duration': 60, 'start': day.isoformat(), 'end': day.isoformat(),
+        })
+        self.assertEqual(response.data['availability'][0]['slots'], [
+            {'date': day.isoformat(), 'start': '12:00', 'end': '20:00'},
+        ])
+
+    def _weekly_series(self):
+        response = self.client.post(
+            reverse('appointment-recurrence', kwargs={'pk': self.template.id}), {'frequency': 'weekly', 'count': 3},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.template.refresh_from_db()
+        return RecurrenceRule.objects.get()
+
+    def test_template_status_only_applies_to_its_date(self):
+        """Test completing the template leaves the upcoming occurrences confirmed."""
+        self._weekly_series()
+        self.template.status = 'completed'
+        self.template.save()
+
+        response = self.client.get(reverse('appointment-list'), self._window(20))
+        self.assertEqual([row['status'] for row in response.data['results']], ['completed', 'confirmed', 'confirmed'])
+
+    def test_canceled_template_keeps_series_booked(self):
+        """Test canceling the template still blocks bookings, availability and imports on later occurrences."""
+        self._weekly_series()
+        self.template.status = 'canceled'
+        self.template.save()
+        day = self.start + timedelta(weeks=1)
+
+        response = self.client.post(reverse('appointment-list'), {
+            'client_id': self.client_profile.id, 'employee': self.artist.id, 'service': 'service_1',
+            'date': day.isoformat(), 'time': '11:00', 'end_time': '12:00', 'price': '150.00',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('availability'), {
+            'employee': self.artist.id, 'duration': 60, 'start': day.isoformat(), 'end': day.isoformat(),
+        })
+        self.assertEqual(response.data['availability'][0]['slots'][0], {'date': day.isoformat(), 'start': '12:00', 'end': '20:00'})
+
+        response = self.client.post(reverse('appointment-bulk-create'), [{
+            'client_id': self.client_profile.id, 'employee': self.artist.id, 'service': 'service_1',
+            'date': day.isoformat(), 'time': '10:00', 'end_time': '11:00', 'price': '150.00',
+        }], format='json')
+        self.assertEqual(response.data['created'], 0)
+
+    def test_rescheduling_template_keeps_series_time(self):
+        """Test moving the template leaves the series in place; moving the series is checked for clashes."""
+        rule = self._weekly_series()
+        response = self.client.patch(
+            reverse('appointment-detail', kwargs={'pk': self.template.id}), {'time': '14:00', 'end_time': '16:00'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('appointment-list'), self._window(20))
+        self.assertEqual([row['time'] for row in response.data['results']], ['14:00:00', '10:00:00', '10:00:00'])
+
+        Appointment.objects.create(
+            client=self.client_profile, employee=self.artist, service=self.service,
+            date=self.start + timedelta(weeks=2), time=time(17, 0), end_time=time(18, 0), price=150.00
+        )
+        url = reverse('appointment-recurrence', kwargs={'pk': self.template.id})
+        response = self.client.patch(url, {'time': '16:00', 'end_time': '18:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {'time': '12:00', 'end_time': '14:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rule.refresh_from_db()
+        self.assertEqual(rule.time, time(12, 0))
+
+    def test_reassigning_template_checks_series(self):
+        """Test moving the template to another employee checks the series against their bookings."""
+        self._weekly_series()
+        other = User.objects.create(username='other', role='employee')
+        Appointment.objects.create(
+            client=self.client_profile, employee=other, service=self.service,
+            date=self.start + timedelta(weeks=1), time=time(11, 0), end_time=time(12, 0), price=150.00
+        )
+        response = self.client.patch(
+            reverse('appointment-detail', kwargs={'pk': self.template.id}), {'employee': other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('employee', response.data)
+
+
+class KeyMetricsRollupTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', role='admin', is_staff=True)
+        self.artist = User.objects.create(username='artist', role='employee')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+        self.day = date.today() - timedelta(days=2)
+        self.appointments = [
+            Appointment.objects.create(
+                client=self.client_profile, employee=self.artist, service=self.service, date=self.day,
+                time=time(hour, 0), end_time=time(hour + 1, 0), price=100.00, status='completed'
+            )
+            for hour in (10, 12)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_rollup_follows_status_and_price_changes(self):
+        """Test the rollup row is updated on save, moved on reschedule and removed on delete."""
+        first, second = self.appointments
+        self.assertEqual(DailyRevenue.objects.get().revenue, 200)
+
+        first.price = 150
+        first.save()
+        self.assertEqual(DailyRevenue.objects.get().revenue, 250)
+
+        second.date = self.day - timedelta(days=1)
+        second.save()
+        self.assertEqual(
+            sorted(DailyRevenue.objects.values_list('date', 'revenue', 'appointments')),
+            [(self.day - timedelta(days=1), 100, 1), (self.day, 150, 1)],
+        )
+
+        first.delete()
+        Appointment.objects.get(pk=second.pk).delete()
+        self.assertFalse(DailyRevenue.objects.exists())
+
+    def test_key_metrics_reads_rollup(self):
+        """Test key metrics sum the rollup rows and count distinct clients."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('key-metrics'), {'range': 'last_7_days'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_revenue'], 200)
+        self.assertEqual(response.data['total_appointments'], 2)
+        self.assertEqual(response.data['clients_served'], 1)
+        self.assertEqual(len([q for q in queries.captured_queries if 'core_dailyrevenue' in q['sql']]), 1)
+
+    def test_bulk_decline_updates_rollup(self):
+        """Test a bulk decline that cancels a completed appointment refreshes the rollup."""
+        notification = Notifications.objects.create(
+            employee=self.artist, appointment=self.appointments[0], action='created'
+        )
+        response = self.client.post(
+            reverse('bulk-notification-action'), {'ids': [notification.id], 'action': 'decline'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(DailyRevenue.objects.get().appointments, 1)
+
+
+    def test_rollup_key_is_locked_before_totals_are_read(self):
+        """Test the rollup row is locked before the appointments are summed, not after."""
+        first = self.appointments[0]
+        first.price = 150
+        with CaptureQueriesContext(connection) as queries:
+            first.save()
+        sql = [q['sql'] for q in queries.captured_queries]
+        lock = next(i for i, q in enumerate(sql) if q.startswith('SELECT') and 'core_dailyrevenue' in q)
+        totals = next(i for i, q in enumerate(sql) if 'SUM(' in q and 'core_appointment' in q)
+        self.assertLess(lock, totals)
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', sql[lock])
+        self.assertEqual(DailyRevenue.objects.get().revenue, 250)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class DailyRevenueConcurrencyTest(TransactionTestCase):
+    """
+    Test two transactions completing appointments for the same rollup key end with the sum
+    of both, whichever commits last. Needs row locks, so it does not run on SQLite (which
+    serializes writers anyway).
+    """
+
+    def setUp(self):
+        self.artist = User.objects.create(username='artist')
+        self.service = Service.objects.create(name='service_1', price=150.00)
+        self.client_profile = ClientProfile.objects.create(
+            first_name='John', last_name='Doe', email='john.doe@example.com', phone='1234567890'
+        )
+
+    def _complete(self, hour, started=None, release=None):
+        try:
+            with transaction.atomic():
+                Appointment.objects.create(
+                    client=self.client_profile, employee=self.artist, service=self.service, date=date(2025, 3, 1),
+                    time=time(hour, 0), end_time=time(hour + 1, 0), price=100.00, status='completed'
+                )
+                if started is not None:
+                    started.set()
+                    release.wait(5)
+        finally:
+            connection.close()
+
+    def test_interleaved_writers_keep_both_appointments(self):
+        """Test a writer that recomputes while another holds the key uncommitted waits and counts both."""
+        started, release = threading.Event(), threading.Event()
+        first = threading.Thread(target=self._complete, args=(10, started, release))
+        first.start()
+        self.assertTrue(started.wait(5))
+        # The second writer reaches the rollup while the first is still uncommitted
+        second = threading.Thread(target=self._complete, args=(12,))
+        second.start()
+        second.join(0.5)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        rollup = DailyRevenue.objects.get()
+        self.assertEqual((rollup.appointments, rollup.revenue), (2, 200))
+
+class MetricsSeriesViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.artists = [User.objects.create(username=f'artist{i}', first_name=f'Artist{i}') for i in range(2)]
+        service = Service.objects.create(name='service_1', price=150.00)
+        clients = [
+            ClientProfile.objects.create(first_name='C', last_name=str(i), email=f'c{i}@example.com', phone='555')
+            for i in range(2)
+        ]
+        # Two appointments in the week of 2025-03-03, one in the week of 2025-03-10
+        for artist, client, day in [
+            (self.artists[0], clients[0], date(2025, 3, 3)),
+            (self.artists[1], clients[0], date(2025, 3, 5)),
+            (self.artists[0], clients[1], date(2025, 3, 11)),
+        ]:
+            Appointment.objects.create(
+                client=client, employee=artist, service=service, date=day,
+                time=time(10, 0), end_time=time(11, 0), price=100.00, status='completed'
+            )
+        self.client.force_authenticate(user=self.artists[0])
+
+    def test_weekly_series_in_one_query(self):
+        """Test appointments are bucketed per week with distinct clients, in one query."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('metrics-series'), {
+                'bucket': 'week', 'from': '2025-03-01', 'to': '2025-03-31',
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(str(p['period']), p['revenue'], p['appointments'], p['clients_served'])
+                          for p in response.data['series']],
+                         [('2025-03-03', 200, 2, 1), ('2025-03-10', 100, 1, 1)])
+        self.assertEqual(len([q for q in queries.captured_queries if 'core_appointment' in q['sql']]), 1)
+
+    def test_monthly_series_grouped_by_employee(self):
+        """Test grouping by employee splits each bucket per artist."""
+        response = self.client.get(reverse('metrics-series'), {
+            'bucket': 'month', 'from': '2025-03-01', 'to': '2025-03-31', 'group_by': 'employee',
+        })
+        self.assertEqual(
+            [(p['employee_name'], p['appointments']) for p in response.data['series']],
+            [('Artist0', 2), ('Artist1', 1)],
+        )
+
+    def test_series_validates_params(self):
+        """Test unknown buckets or groupings and reversed ranges return 400."""
+        for params in [{'bucket': 'year'}, {'group_by': 'client'}, {'from': '2025-03-02', 'to': '2025-03-01'}]:
+            response = self.client.get(reverse('metrics-series'), params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ClientSearchViewTest(TestCase):
+
+    def setUp(self):
+        invalidate_client_index()
+        self.client = APIClient()
+        self.artist = User.objects.create(username='artist')
+        self.jane = ClientProfile.objects.create(
+            first_name='Jane', last_name='Doe', email='jane@example.com', phone='(555) 010-2000'
+        )
+        self.john = ClientProfile.objects.create(
+            first_name='John', last_name='Dorian', email='jd@example.com', phone='555-020-3000'
+        )
+        ClientProfile.objects.create(first_name='Alex', last_name='Smith', email='alex@example.com', phone='777')
+        self.client.force_authenticate(user=self.artist)
+
+    def _ids(self, q, **params):
+        response = self.client.get(reverse('client-search'), {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data]
+
+    def test_search_matches_name_email_and_phone_prefixes(self):
+        """Test prefixes of names, emails and phone digits match, and several terms narrow the hits."""
+        self.assertEqual(self._ids('do'), [self.jane.id, self.john.id])
+        self.assertEqual(self._ids('JD@'), [self.john.id])
+        self.assertEqual(self._ids('555 01'), [])
+        self.assertEqual(self._ids('555-01'), [self.jane.id])
+        self.assertEqual(self._ids('j do'), [self.jane.id, self.john.id])
+        self.assertEqual(self._ids('jo dor'), [self.john.id])
+        self.assertEqual(self._ids('do', limit=1), [self.jane.id])
+        self.assertEqual(self._ids(''), [])
+
+    def test_search_served_without_queries_once_warm(self):
+        """Test a warm index answers without any database query, cache table included."""
+        self._ids('jane')
+        with CaptureQueriesContext(connection) as queries:
+            self._ids('jo')
+        self.assertEqual(queries.captured_queries, [])
+
+    def _expire_local_check(self):
+        client_index._index.checked -= caching.LOCAL_TTL
+
+    def test_other_worker_changes_are_synced(self):
+        """
+        Test a save signalled by another process is read as a delta once the local TTL runs out,
+        even when this process saved a client after it, and a remote delete triggers a reload.
+        """
+        self._ids('jane')
+        # Another worker renames Jane: the row and the shared version change, this index does not
+        ClientProfile.objects.filter(pk=self.jane.pk).update(first_name='Janet', updated_at=now())
+        cache.set(client_index.CLIENT_INDEX_VERSION_KEY, 'rotated-elsewhere', timeout=None)
+        # ...then this worker saves a client of its own, rotating the version again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.john.phone = '555-020-3001'
+            self.john.save()
+        self.assertEqual(self._ids('janet'), [])
+
+        self._expire_local_check()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._ids('janet'), [self.jane.id])
+        client_reads = [q['sql'] for q in queries.captured_queries if 'core_clientprofile' in q['sql']]
+        self.assertEqual(len(client_reads), 1)
+        self.assertIn('updated_at', client_reads[0])
+
+        # Another worker deletes Alex; deletes leave no row, so the generation key forces a reload
+        alex = ClientProfile.objects.get(first_name='Alex')
+        with self.captureOnCommitCallbacks():
+            alex.delete()
+        cache.set(client_index.CLIENT_INDEX_GENERATION_KEY, 'rotated-elsewhere', timeout=None)
+        self._expire_local_check()
+        self.assertEqual(self._ids('alex'), [])
+
+    def test_index_follows_client_changes(self):
+        """Test saves and deletes are applied to the index after commit."""
+        self._ids('jane')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jane.first_name = 'Janet'
+            self.jane.save()
+        self.assertEqual(self._ids('janet'), [self.jane.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.john.delete()
+        self.assertEqual(self._ids('dor'), [])
+
+
+class SearchViewTest(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create(username='admin', role='admin')
+        self.artist = User.objects.create(username='artist', role='employee')
+        self.other = User.objects.create(username='other', role='employee')
+        service = Service.objects.create(name='service_1', price=150.00)
+        client = ClientProfile.objects.create(first_name='John', last_name='Doe', email='john@example.com', phone='555')
+
+        def book(employee, hour, notes):
+            return Appointment.objects.create(
+                client=client, employee=employee, service=service, date=date(2025, 3, 1),
+                time=time(hour, 0), end_time=time(hour + 1, 0), price=150.00, notes=notes
+            )
+
+        self.sleeve = book(self.artist, 10, 'Left forearm sleeve, latex allergy. Allergy card on file.')
+        self.back = book(self.artist, 12, 'Back piece, reference photos emailed')
+        self.other_allergy = book(self.other, 10, 'Allergy to red ink')
+        self.notification = Notifications.objects.create(
+            employee=self.artist, appointment=self.back, action='updated',
+            changes={'notes': {'old': 'Back piece', 'new': 'Back piece, nickel allergy'}}
+        )
+
+    def _search(self, user, **params):
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse('search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_search_ranks_notes_and_notification_changes(self):
+        """Test matches in notes and in notification changes are returned best first."""
+        data = self._search(self.admin, q='allergies')
+        hits = [(row['type'], row['id']) for row in data['results']]
+        self.assertEqual(hits[0], ('appointment', self.sleeve.id))
+        self.assertCountEqual(hits[1:], [
+            ('appointment', self.other_allergy.id), ('notification', self.notification.id),
+        ])
+        self.assertEqual(data['results'][0]['appointment']['notes'], self.sleeve.notes)
+
+    def test_search_scopes_and_pages(self):
+        """Test employees only find their own rows and results page with a next link."""
+        data = self._search(self.artist, q='allergy', page_size=1)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+        second = self._search(self.artist, q='allergy', page_size=1, page=2)
+        self.assertIsNone(second['next'])
+        ids = {(row['type'], row['id']) for row in data['results'] + second['results']}
+        self.assertEqual(ids, {('appointment', self.sleeve.id), ('notification', self.notification.id)})
+
+    def test_search_follows_edits_and_deletes(self):
+        """Test the index picks up changed notes and drops deleted appointments."""
+        self.back.notes = 'Back piece, allergy to lidocaine'
+        self.back.save()
+        self.sleeve.delete()
+        data = self._search(self.artist, q='allergy', type='appointment')
+        self.assertEqual([row['id'] for row in data['results']], [self.back.id])
+
+    def test_search_validates_params(self):
+        """Test a missing query or unknown type returns 400."""
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(reverse('search')).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('search'), {'q': 'x', 'type': 'client'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,10 +2,13 @@ from django.urls import path
 from core.views import (
     RegisterView, LoginView, LogoutView, UserView,
     UserListView, UserDetailView,
-    ClientProfileListView, ClientProfileDetailView,
+    ClientProfileListView, ClientProfileDetailView, ClientSearchView,
     ServiceListView, ServiceDetailView,
-    AppointmentListView, AppointmentDetailView, AppointmentOverviewView, RescheduleAppointmentView,
-    RecentActivityView, ApproveNotificationView, DeclineNotificationView, DeleteNotificationView, CSRFTokenView, KeyMetrics, BillingSummaryView
+    AppointmentListView, AppointmentDetailView, AppointmentOverviewView, RescheduleAppointmentView, AppointmentExportView,
+    AppointmentChangesView, AppointmentBulkCreateView, AppointmentRecurrenceView, SeriesOccurrenceView,
+    RecentActivityView, ApproveNotificationView, DeclineNotificationView, DeleteNotificationView, CSRFTokenView, KeyMetrics, BillingSummaryView,
+    BillingExportView, AvailabilityView, NotificationStreamView,
+    BulkNotificationActionView, MetricsSeriesView, SearchView
 )
 
 urlpatterns = [
@@ -23,6 +26,7 @@ urlpatterns = [
     # Client Profiles
     path("clients/", ClientProfileListView.as_view(), name="clientprofile-list"),
     path("clients/<int:pk>/", ClientProfileDetailView.as_view(), name="clientprofile-detail"),
+    path("clients/search/", ClientSearchView.as_view(), name="client-search"),
 
     # Services
     path("services/", ServiceListView.as_view(), name="service-list"),
@@ -30,16 +34,31 @@ urlpatterns = [
 
     #Metrics
     path("metrics/", KeyMetrics.as_view(), name="key-metrics"),
+    path("metrics/series/", MetricsSeriesView.as_view(), name="metrics-series"),
     path("billing/summary/", BillingSummaryView.as_view(), name="billing-summary"),
+    path("billing/export/", BillingExportView.as_view(), name="billing-export"),
 
     # Appointments
     path("appointments/", AppointmentListView.as_view(), name="appointment-list"),
     path("appointments/<int:pk>/", AppointmentDetailView.as_view(), name="appointment-detail"),
     path("appointments/overview/", AppointmentOverviewView.as_view(), name="appointment-overview"),
+    path("appointments/export/", AppointmentExportView.as_view(), name="appointment-export"),
+    path("appointments/changes/", AppointmentChangesView.as_view(), name="appointment-changes"),
+    path("appointments/bulk/", AppointmentBulkCreateView.as_view(), name="appointment-bulk-create"),
     path("appointments/<int:pk>/reschedule/", RescheduleAppointmentView.as_view(), name="reschedule-appointment"),
+    path("appointments/<int:pk>/recurrence/", AppointmentRecurrenceView.as_view(), name="appointment-recurrence"),
+    path("appointments/series/<int:series_pk>/occurrences/<str:occurrence_date>/", SeriesOccurrenceView.as_view(), name="series-occurrence"),
+
+    # Search
+    path("search/", SearchView.as_view(), name="search"),
+
+    # Availability
+    path("availability/", AvailabilityView.as_view(), name="availability"),
 
     # Notifications
     path("recent-activity/", RecentActivityView.as_view(), name="recent-activity"),
+    path("recent-activity/stream/", NotificationStreamView.as_view(), name="notification-stream"),
+    path("recent-activity/bulk/", BulkNotificationActionView.as_view(), name="bulk-notification-action"),
     path("recent-activity/<int:pk>/approve/", ApproveNotificationView.as_view(), name="approve-notification"),
     path("recent-activity/<int:pk>/decline/", DeclineNotificationView.as_view(), name="decline-notification"),
     path("recent-activity/<int:pk>/delete/", DeleteNotificationView.as_view(), name="delete-notification"),
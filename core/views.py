@@ -1,30 +1,104 @@
+import asyncio
+import json
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.views import View
 from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.utils.urls import replace_query_param
 from django.middleware.csrf import get_token
 from django.contrib.auth import authenticate, login, logout, get_user_model
-from django.utils.timezone import now
-from datetime import date, timedelta
+from django.utils.timezone import localtime, now
+from django.utils.dateparse import parse_date, parse_time
+from datetime import date, datetime, timedelta
 from decimal import Decimal
-from django.db.models import Sum
-from .models import ClientProfile, Service, Appointment, Notifications
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from .models import ClientProfile, Service, Appointment, AppointmentTombstone, DailyRevenue, Notifications, RecurrenceRule
+from .pagination import AppointmentCursorPagination, NotificationCursorPagination
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, streaming_export
+from .availability import find_availability
+from .caching import get_service_catalog, make_etag
+from .client_index import CLIENT_SEARCH_LIMIT, get_client_index
+from .events import get_broker, publish_notifications
+from . import fulltext
+from .importing import import_appointments
+from .recurrence import booked_slots, expand_occurrences, overlaps, pending_occurrences, rules_for_window
+from .rollups import sync_daily_revenue
 from .serializers import (
     UserSerializer,
     ClientProfileSerializer,
     ServiceSerializer,
     AppointmentSerializer,
-    NotificationSerializer
+    NotificationSerializer,
+    RecurrenceRuleSerializer
 )
 
 # ✅ Get the custom user model
 User = get_user_model()
 
+
+def _parse_date_param(params, name):
+    """Parse an optional YYYY-MM-DD query param, raising a 400 on malformed or impossible dates."""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except (TypeError, ValueError):
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Use a valid YYYY-MM-DD date."})
+    return parsed
+
+
+def _parse_id_param(params, name):
+    """Parse an optional numeric id query param, raising a 400 when it is not one."""
+    value = params.get(name)
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: f"{name.capitalize()} must be an id."})
+    return int(value)
+
+
+class ConditionalListMixin:
+    """
+    Answers If-None-Match on list endpoints with 304 when nothing in the filtered scope
+    changed. The version token is MAX(updated_at) plus COUNT(*) over the scope (the
+    count catches deletions), keyed to the user and full query string. Rows whose
+    payload includes related rows (client and employee names, a notification's
+    appointment) list those relations in ``etag_related``; their MAX(updated_at)
+    joins the token, so editing them invalidates the ETag too.
+    """
+    etag_related = ()
+
+    def list(self, request, *args, **kwargs):
+        version = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last_updated=Max("updated_at"), count=Count("id"),
+            **{f"related_{i}": Max(f"{relation}__updated_at") for i, relation in enumerate(self.etag_related)},
+        )
+        etag = make_etag([request.user.pk, request.get_full_path(), *version.values()])
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        return response
+
+
 # 🔹 Authentication Views
 class RegisterView(generics.CreateAPIView):
     """
@@ -133,6 +207,30 @@ class ClientProfileListView(ListCreateAPIView):
         serializer.save()
 
 
+class ClientSearchView(APIView):
+    """
+    Typeahead for the booking form: clients whose first name, last name, email or
+    phone starts with each term of ``q``. Served from the in-process prefix index.
+    """
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", CLIENT_SEARCH_LIMIT)), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "Limit must be a number."})
+        if limit <= 0:
+            raise ValidationError({"limit": "Limit must be positive."})
+
+        query = request.query_params.get("q", "")
+        hits = get_client_index().search(query, limit=limit) if query.strip() else []
+        return Response([
+            {"id": client_id, "first_name": first_name, "last_name": last_name, "email": email, "phone": phone}
+            for client_id, first_name, last_name, email, phone in hits
+        ])
+
+
 class ClientProfileDetailView(RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, or deleting a specific client profile.
@@ -145,11 +243,23 @@ class ClientProfileDetailView(RetrieveUpdateDestroyAPIView):
 class ServiceListView(ListCreateAPIView):
     """
     Handles listing all services and creating new ones.
+    The list is served from the service catalog cache with ETag/Last-Modified validators.
     """
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        catalog = get_service_catalog()
+        response = get_conditional_response(
+            request, etag=catalog["etag"], last_modified=int(catalog["last_modified"].timestamp())
+        )
+        if response is None:
+            response = Response(catalog["data"])
+        response["ETag"] = catalog["etag"]
+        response["Last-Modified"] = http_date(catalog["last_modified"].timestamp())
+        return response
+
 class ServiceDetailView(RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, or deleting a specific service.
@@ -158,35 +268,112 @@ class ServiceDetailView(RetrieveUpdateDestroyAPIView):
     serializer_class = ServiceSerializer
     permission_classes = [IsAuthenticated]
 
-class AppointmentListView(ListCreateAPIView):
+class AppointmentListView(ConditionalListMixin, ListCreateAPIView):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AppointmentCursorPagination
+    max_window_days = 366
+    etag_related = ("client", "employee", "service")
 
-    def get_queryset(self):
+    def get_window(self):
+        """
+        (date_from, date_to) when both are given. A window replaces the archived/upcoming
+        split and expands recurring series into their occurrences for that range.
+        """
+        params = self.request.query_params
+        date_from, date_to = _parse_date_param(params, "date_from"), _parse_date_param(params, "date_to")
+        if date_from is None or date_to is None:
+            return None
+        if date_to < date_from:
+            raise ValidationError({"date_to": "date_to must not be before date_from."})
+        if (date_to - date_from).days >= self.max_window_days:
+            raise ValidationError({"date_to": f"Window may not exceed {self.max_window_days} days."})
+        return date_from, date_to
+
+    def get_employee_scope(self):
+        """The employee whose appointments are listed, or None for everyone (admins only)."""
         user = self.request.user
-        archived = self.request.query_params.get("archived")
-        employee = self.request.query_params.get("employee")
-
         if user.role == "admin":
-            if archived and archived.lower() == "true":
-                qs = Appointment.objects.filter(date__lt=date.today())
-            else:
-                qs = Appointment.objects.filter(date__gte=date.today())
+            return _parse_id_param(self.request.query_params, "employee")
+        return user
 
-            if employee:
-                qs = qs.filter(employee__id=employee)
+    def get_filters(self):
+        """
+        ORM lookups for the optional ``status`` (repeatable or comma-separated), ``service``
+        (name), ``client`` (id) and ``requires_approval`` filters, applied in every mode.
+        """
+        params = self.request.query_params
+        filters = {}
+
+        statuses = [value for param in params.getlist("status") for value in param.split(",") if value]
+        if statuses:
+            unknown = set(statuses) - {value for value, _label in Appointment.STATUS_CHOICES}
+            if unknown:
+                raise ValidationError({"status": f"Unknown status: {', '.join(sorted(unknown))}."})
+            filters["status__in"] = statuses
+
+        service = params.get("service")
+        if service:
+            if service not in dict(Service.SERVICE_CHOICES):
+                raise ValidationError({"service": f"Unknown service: {service}."})
+            filters["service__name"] = service
+
+        client = _parse_id_param(params, "client")
+        if client is not None:
+            filters["client_id"] = client
+
+        requires_approval = params.get("requires_approval")
+        if requires_approval:
+            if requires_approval.lower() not in ("true", "false"):
+                raise ValidationError({"requires_approval": "Use true or false."})
+            filters["requires_approval"] = requires_approval.lower() == "true"
+
+        return filters
 
-            return qs
+    def get_queryset(self):
+        params = self.request.query_params
+        qs = Appointment.objects.for_listing(AppointmentSerializer.sparse_fields(self.request))
 
-        if user.role == "employee":
+        window = self.get_window()
+        if window is not None:
+            qs = qs.filter(date__range=window)
+        else:
+            archived = params.get("archived")
             if archived and archived.lower() == "true":
-                qs = Appointment.objects.filter(employee=user, date__lt=date.today())
+                qs = qs.filter(date__lt=date.today())
             else:
-                qs = Appointment.objects.filter(employee=user, date__gte=date.today())
-
-            return qs
-
+                qs = qs.filter(date__gte=date.today())
+            # A single bound narrows the archived/upcoming split instead of replacing it
+            date_from, date_to = _parse_date_param(params, "date_from"), _parse_date_param(params, "date_to")
+            if date_from:
+                qs = qs.filter(date__gte=date_from)
+            if date_to:
+                qs = qs.filter(date__lte=date_to)
+
+        scope = self.get_employee_scope()
+        if scope:
+            qs = qs.filter(employee=scope)
+        return qs.filter(**self.get_filters())
+
+    def get_occurrences(self, window):
+        """Expanded recurring occurrences in ``window`` that match the list filters."""
+        filters = self.get_filters()
+        if filters.pop("requires_approval", False):
+            # Unstored occurrences never await approval
+            return []
+        # Occurrences take their status from the rule, everything else from the template
+        rules = rules_for_window(*window, employee=self.get_employee_scope()).filter(
+            **{lookup if lookup == "status__in" else f"appointment__{lookup}": value for lookup, value in filters.items()}
+        )
+        return expand_occurrences(rules, *window)
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        window = self.get_window()
+        if page is None or window is None:
+            return page
+        return self.paginator.merge_extra(page, self.get_occurrences(window))
 
     def perform_create(self, serializer):
         appointment = serializer.save()
@@ -211,10 +398,13 @@ class AppointmentDetailView(RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, or deleting a specific appointment.
     """
-    queryset = Appointment.objects.all()
+    queryset = Appointment.objects.for_listing()
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return Appointment.objects.for_listing(AppointmentSerializer.sparse_fields(self.request))
+
 class AppointmentOverviewView(APIView):
     """
     Returns an overview of appointment data.
@@ -232,21 +422,143 @@ class AppointmentOverviewView(APIView):
             end_of_week = start_of_week + timedelta(days=6)
             queryset = queryset.filter(date__range=[start_of_week, end_of_week])
 
-        data = {
-            "total": queryset.count(),
-            "completed": queryset.filter(status="completed").count(),
-            "pending": queryset.filter(status="pending").count(),
-            "canceled": queryset.filter(status="canceled").count(),
-            "no_show": queryset.filter(status="no_show").count(),
-        }
+        group_by = request.query_params.get("group_by")
+        if group_by is None:
+            return Response(queryset.status_counts())
+        if group_by != "employee":
+            return Response({"error": "group_by must be 'employee'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One GROUP BY pass; the shop-wide totals are summed from the grouped rows.
+        expressions = Appointment.status_count_expressions()
+        rows = list(
+            queryset.values("employee", "employee__first_name", "employee__last_name")
+            .annotate(**expressions)
+            .order_by("employee")
+        )
+        count_keys = expressions.keys()
+        data = {key: sum(row[key] for row in rows) for key in count_keys}
+        data["by_employee"] = [
+            {
+                "employee": row["employee"],
+                "employee_name": f"{row['employee__first_name']} {row['employee__last_name']}".strip(),
+                **{key: row[key] for key in count_keys},
+            }
+            for row in rows
+        ]
 
         return Response(data)
 
+class AppointmentExportView(APIView):
+    """
+    Streams appointment history as CSV or NDJSON (?export_format=), optionally
+    limited by date_from/date_to, status and (for admins) employee.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        export_format = _resolve_export_format(request)
+        queryset = Appointment.objects.all()
+
+        if request.user.role == "admin":
+            employee = _parse_id_param(request.query_params, "employee")
+            if employee:
+                queryset = queryset.filter(employee__id=employee)
+        else:
+            queryset = queryset.filter(employee=request.user)
+
+        for param, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+            value = _parse_date_param(request.query_params, param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+
+        appt_status = request.query_params.get("status")
+        if appt_status:
+            queryset = queryset.filter(status=appt_status)
+
+        header = (
+            "id", "date", "time", "end_time", "status", "employee_id", "employee_first_name",
+            "employee_last_name", "client_first_name", "client_last_name", "client_email",
+            "service", "price", "requires_approval", "notes",
+        )
+        rows = queryset.order_by("date", "time", "id").values_list(
+            "id", "date", "time", "end_time", "status", "employee", "employee__first_name",
+            "employee__last_name", "client__first_name", "client__last_name", "client__email",
+            "service__name", "price", "requires_approval", "notes",
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return streaming_export(header, rows, export_format, "appointments")
+
+class AppointmentChangesView(APIView):
+    """
+    Delta sync for the front-desk tablets.
+
+    Without ``since`` the full upcoming schedule is returned; with the ``token`` from a
+    previous response only appointments created or updated since then are returned,
+    along with the ids of appointments deleted since then.
+    """
+    permission_classes = [IsAuthenticated]
+    token_salt = "core.appointment-changes"
+    # Each watermark is moved back by this much so rows committed late by a long-running
+    # transaction are still picked up; clients apply rows idempotently, so repeats are harmless.
+    overlap = timedelta(seconds=30)
+
+    def get(self, request):
+        user = request.user
+        started = now()
+        appointments = Appointment.objects.for_listing()
+        tombstones = AppointmentTombstone.objects.all()
+
+        if user.role == "admin":
+            employee = _parse_id_param(request.query_params, "employee")
+            if employee is not None:
+                appointments = appointments.filter(employee__id=employee)
+                tombstones = tombstones.filter(employee_id=employee)
+        else:
+            appointments = appointments.filter(employee=user)
+            tombstones = tombstones.filter(employee_id=user.id)
+
+        since_token = request.query_params.get("since")
+        if since_token:
+            try:
+                since = datetime.fromisoformat(signing.loads(since_token, salt=self.token_salt))
+            except (signing.BadSignature, TypeError, ValueError):
+                raise ValidationError({"since": "Invalid sync token."})
+            # Tombstones older than this are pruned, so deletions before it can no longer be reported
+            if since < started - timedelta(days=settings.APPOINTMENT_TOMBSTONE_RETENTION_DAYS):
+                raise ValidationError({"since": "Sync token expired; sync again without it."})
+            changed = appointments.filter(updated_at__gte=since)
+            deleted = tombstones.filter(deleted_at__gte=since).values_list("appointment_id", flat=True)
+        else:
+            changed = appointments.filter(date__gte=date.today())
+            deleted = []
+
+        changed = AppointmentSerializer(changed.order_by("date", "time", "id"), many=True).data
+        # An appointment reassigned away and back again (or seen by an unfiltered admin sync)
+        # has a tombstone but is still in scope; the changed row wins
+        current = {row["id"] for row in changed}
+        return Response({
+            "token": signing.dumps((started - self.overlap).isoformat(), salt=self.token_salt),
+            "changed": changed,
+            "deleted": [pk for pk in dict.fromkeys(deleted) if pk not in current],
+        })
+
+class AppointmentBulkCreateView(APIView):
+    """
+    Creates many appointments from a JSON list of flat rows (see AppointmentImportSerializer).
+    Valid rows are inserted; invalid ones are reported by index.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({"error": "Expected a list of appointments."})
+        report = import_appointments(request.data, request.user)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"] else status.HTTP_400_BAD_REQUEST)
+
 class RescheduleAppointmentView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, pk):
-        appointment = get_object_or_404(Appointment, pk=pk)
+        appointment = get_object_or_404(Appointment.objects.for_listing(), pk=pk)
         data = request.data
         user = request.user
 
@@ -254,9 +566,15 @@ class RescheduleAppointmentView(APIView):
         new_status = data.get("status")
         if new_status in ["completed", "no_show"]:
             previous_status = appointment.status
+            # A canceled or no-show slot may have been rebooked; completing it would double-book
+            reactivating = previous_status in Appointment.INACTIVE_STATUSES and new_status == "completed"
+            slot = (appointment.date, appointment.time, appointment.end_time)
+            if reactivating and _slot_conflicts([(appointment.pk, appointment, slot)]):
+                return Response({"error": REACTIVATE_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
             appointment.status = new_status
             appointment.requires_approval = False
-            appointment.save()
+            if not _save_guarded(appointment):
+                return Response({"error": REACTIVATE_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
 
             if new_status == "no_show":
                 Notifications.objects.create(
@@ -354,39 +672,465 @@ class RescheduleAppointmentView(APIView):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# 🔹 Recurring Series Views
+def _check_series_owner(user, appointment):
+    if user.role != "admin" and appointment.employee_id != user.id:
+        raise PermissionDenied("You can only manage your own appointments.")
+
+
+class AppointmentRecurrenceView(APIView):
+    """
+    POST turns an appointment into the first occurrence of a recurring series.
+    PATCH reschedules the series (time, end_time, status, frequency...); upcoming
+    occurrences are checked for clashes, the template and edited occurrences keep theirs.
+    DELETE ends the series before ``from`` (default today); occurrences already
+    edited into their own appointments are kept.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        appointment = get_object_or_404(Appointment, pk=pk)
+        _check_series_owner(request.user, appointment)
+        if appointment.series_id is not None:
+            return Response({"error": "This appointment already belongs to a series."}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = RecurrenceRuleSerializer(data=request.data, context={"appointment": appointment})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            rule = serializer.save(appointment=appointment)
+            appointment.series = rule
+            appointment.occurrence_date = appointment.date
+            appointment.save(update_fields=["series", "occurrence_date", "updated_at"])
+        return Response(RecurrenceRuleSerializer(rule).data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request, pk):
+        rule = get_object_or_404(RecurrenceRule.objects.select_related("appointment"), appointment_id=pk)
+        _check_series_owner(request.user, rule.appointment)
+
+        serializer = RecurrenceRuleSerializer(
+            rule, data=request.data, partial=True, context={"appointment": rule.appointment}
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            rule = serializer.save()
+            # Touch the template so conditional list requests see the change
+            rule.appointment.save(update_fields=["updated_at"])
+        return Response(RecurrenceRuleSerializer(rule).data, status=status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        rule = get_object_or_404(RecurrenceRule.objects.select_related("appointment"), appointment_id=pk)
+        _check_series_owner(request.user, rule.appointment)
+        ends_before = _parse_date_param(request.query_params, "from") or localtime().date()
+        if ends_before <= rule.starts_on:
+            return Response({"error": "A series cannot end before its first appointment."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            rule.until = ends_before - timedelta(days=1)
+            rule.save()
+            # Touch the template so conditional list requests see the change
+            rule.appointment.save(update_fields=["updated_at"])
+        return Response(RecurrenceRuleSerializer(rule).data, status=status.HTTP_200_OK)
+
+
+class SeriesOccurrenceView(APIView):
+    """
+    Edits one occurrence of a series by materializing it as its own appointment.
+    Fields not sent are copied from the series template. Employee edits go through
+    approval like a reschedule.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def patch(self, request, series_pk, occurrence_date):
+        rule = get_object_or_404(
+            RecurrenceRule.objects.select_related("appointment__client", "appointment__service"), pk=series_pk
+        )
+        user = request.user
+        _check_series_owner(user, rule.appointment)
+
+        occurrence_date = parse_date(occurrence_date) if len(occurrence_date) == 10 else None
+        if occurrence_date is None or occurrence_date not in rule.occurrence_dates(occurrence_date, occurrence_date):
+            return Response({"error": "The series has no occurrence on this date."}, status=status.HTTP_404_NOT_FOUND)
+        existing = rule.occurrences.filter(occurrence_date=occurrence_date).values_list("id", flat=True).first()
+        if existing is not None:
+            return Response(
+                {"error": "This occurrence has already been edited.", "appointment": existing},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        template = rule.appointment
+        previous_data = {
+            "date": str(occurrence_date),
+            "time": str(rule.time),
+            "end_time": str(rule.end_time),
+            "price": str(template.price),
+            "service": template.service.name,
+            "notes": template.notes,
+        }
+        data = {**previous_data, "client_id": template.client_id, "employee": template.employee_id, "status": rule.status}
+        data.update({key: value for key, value in request.data.items() if key in data})
+        if user.role != "admin":
+            data.update(status="pending", requires_approval=True)
+
+        serializer = AppointmentSerializer(data=data, context={"series": rule})
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            appointment = serializer.save(series=rule, occurrence_date=occurrence_date)
+            if user.role != "admin":
+                Notifications.objects.create(
+                    employee=user,
+                    appointment=appointment,
+                    action="updated",
+                    changes={
+                        key: {"old": old, "new": request.data[key]}
+                        for key, old in previous_data.items() if key in request.data and request.data[key] != old
+                    },
+                    previous_details=previous_data,
+                    status="pending",
+                )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+# 🔹 Search Views
+class SearchView(APIView):
+    """
+    Full-text search over appointment notes and notification changes, best match first.
+    ``type`` limits results to ``appointment`` or ``notification``; pages are numbered
+    (``page``, ``page_size``) because rank order has no stable key to page on.
+    Employees only see their own appointments and notifications.
+    """
+    permission_classes = [IsAuthenticated]
+    page_size = 20
+    max_page_size = 100
+
+    def get(self, request):
+        params = request.query_params
+        query = params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "A search query is required."})
+        kinds = fulltext.SEARCH_KINDS
+        if params.get("type"):
+            if params["type"] not in fulltext.SEARCH_KINDS:
+                raise ValidationError({"type": "Type must be 'appointment' or 'notification'."})
+            kinds = (params["type"],)
+        try:
+            page = int(params.get("page", 1))
+            page_size = min(int(params.get("page_size", self.page_size)), self.max_page_size)
+        except ValueError:
+            raise ValidationError({"page": "Page and page_size must be numbers."})
+        if page < 1 or page_size < 1:
+            raise ValidationError({"page": "Page and page_size must be positive."})
+
+        employee = None if request.user.role == "admin" else request.user
+        hits = fulltext.search(query, kinds, employee=employee, offset=(page - 1) * page_size, limit=page_size + 1)
+        has_next = len(hits) > page_size
+        hits = hits[:page_size]
+
+        appointments = Appointment.objects.for_listing().in_bulk(
+            [object_id for kind, object_id, _ in hits if kind == "appointment"]
+        )
+        notifications = Notifications.objects.for_feed().in_bulk(
+            [object_id for kind, object_id, _ in hits if kind == "notification"]
+        )
+        results = []
+        for kind, object_id, rank in hits:
+            if kind == "appointment" and object_id in appointments:
+                data = AppointmentSerializer(appointments[object_id]).data
+            elif kind == "notification" and object_id in notifications:
+                data = NotificationSerializer(notifications[object_id]).data
+            else:
+                continue  # Deleted between the search and the fetch
+            results.append({"type": kind, "id": object_id, "rank": rank, kind: data})
+
+        next_link = None
+        if has_next:
+            next_link = replace_query_param(request.build_absolute_uri(), "page", page + 1)
+        return Response({"next": next_link, "results": results})
+
+
+# 🔹 Availability Views
+class AvailabilityView(APIView):
+    """
+    Returns open slots of at least ``duration`` minutes per artist between
+    ``start`` and ``end`` (inclusive, up to 90 days), within shop hours.
+    Repeat ``employee`` to select artists; all active users are searched by default.
+    Occurrences of recurring series count as bookings whether or not they are stored.
+    """
+    permission_classes = [IsAuthenticated]
+    max_window_days = 90
+
+    def get(self, request):
+        params = request.query_params
+
+        try:
+            duration = int(params.get("duration", ""))
+        except ValueError:
+            raise ValidationError({"duration": "Duration in minutes is required."})
+        if duration <= 0:
+            raise ValidationError({"duration": "Duration must be positive."})
+
+        start_date = _parse_date_param(params, "start") or localtime().date()
+        end_date = _parse_date_param(params, "end") or start_date + timedelta(days=6)
+        if end_date < start_date:
+            raise ValidationError({"end": "End must not be before start."})
+        if (end_date - start_date).days >= self.max_window_days:
+            raise ValidationError({"end": f"Window may not exceed {self.max_window_days} days."})
+
+        employees = User.objects.filter(is_active=True)
+        employee_ids = params.getlist("employee")
+        if not all(value.isdigit() for value in employee_ids):
+            raise ValidationError({"employee": "Employee must be an id."})
+        if employee_ids:
+            employees = employees.filter(id__in=employee_ids)
+        employees = list(employees.order_by("id").values_list("id", "first_name", "last_name"))
+
+        bookings = (
+            Appointment.objects.filter(employee__in=[row[0] for row in employees], date__range=[start_date, end_date])
+            .exclude(status__in=Appointment.INACTIVE_STATUSES)
+            .order_by("employee", "date", "time")
+            .values_list("employee", "date", "time", "end_time")
+        )
+        rules = (
+            RecurrenceRule.objects.in_window(start_date, end_date)
+            .filter(appointment__employee__in=[row[0] for row in employees])
+            .exclude(status__in=Appointment.INACTIVE_STATUSES)
+            .select_related("appointment")
+        )
+        occurrences = [
+            (rule.appointment.employee_id, occurrence_date, rule.time, rule.end_time)
+            for rule, occurrence_date in pending_occurrences(rules, start_date, end_date)
+        ]
+        if occurrences:
+            bookings = sorted([*bookings, *occurrences])
+        current = localtime()
+        slots = find_availability(
+            bookings,
+            [row[0] for row in employees],
+            start_date,
+            end_date,
+            duration,
+            parse_time(settings.SHOP_OPENING_TIME),
+            parse_time(settings.SHOP_CLOSING_TIME),
+            earliest=(current.date(), current.time()),
+        )
+
+        return Response({
+            "duration": duration,
+            "start": start_date,
+            "end": end_date,
+            "availability": [
+                {
+                    "employee": employee_id,
+                    "employee_name": f"{first_name} {last_name}".strip(),
+                    "slots": slots[employee_id],
+                }
+                for employee_id, first_name, last_name in employees
+            ],
+        })
+
+
 # 🔹 Notification Views
-class RecentActivityView(ListAPIView):
+class RecentActivityView(ConditionalListMixin, ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    etag_related = (
+        "employee", "appointment", "appointment__client", "appointment__employee", "appointment__service"
+    )
 
     def get_queryset(self):
         user = self.request.user
 
-        # Auto-delete notifications older than 30 days
-        threshold_date = now() - timedelta(days=30)
-        Notifications.objects.filter(timestamp__lt=threshold_date).delete()
+        # Expired notifications are deleted by `manage.py prune_notifications`; hide any not yet pruned
+        threshold_date = now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        queryset = Notifications.objects.for_feed(
+            NotificationSerializer.sparse_fields(self.request)
+        ).filter(timestamp__gte=threshold_date)
 
         if user.role == "admin":
             # Exclude notifications where the employee is the current admin
-            return Notifications.objects.exclude(employee=user).order_by("-timestamp")
-        return Notifications.objects.filter(employee=user).order_by("-timestamp")
+            return queryset.exclude(employee=user).order_by("-timestamp")
+        return queryset.filter(employee=user).order_by("-timestamp")
+
+
+class NotificationStreamView(View):
+    """
+    Server-Sent Events stream of notification changes for admins, replacing polling
+    of RecentActivityView. Requires an ASGI server (tattoo_app.asgi:application):
+    under WSGI or runserver each open stream would hold a worker for good, so it is
+    refused with 501 and clients keep polling. Events: created/updated carry the
+    serialized notification, deleted carries {"id", "employee"}, pruned {"before"}.
+    """
+    keepalive_seconds = 15
+
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated or user.role != "admin":
+            return JsonResponse({"detail": "Admins only."}, status=403)
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {"detail": "The notification stream needs an ASGI server; poll /recent-activity/ instead."},
+                status=501,
+            )
+
+        broker = get_broker()
+        subscription = broker.subscribe()
+
+        async def events():
+            try:
+                yield "retry: 5000\n\n"
+                while True:
+                    try:
+                        message = await asyncio.wait_for(subscription.get(), timeout=self.keepalive_seconds)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                    # Same scope as RecentActivityView: admins don't see their own notifications
+                    if message["notification"].get("employee") == user.id:
+                        continue
+                    yield f"event: {message['event']}\ndata: {json.dumps(message['notification'], cls=DjangoJSONEncoder)}\n\n"
+            finally:
+                broker.unsubscribe(subscription)
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+REVERT_CONFLICT_MESSAGE = "The appointment's previous time now overlaps another appointment for this employee."
+REACTIVATE_CONFLICT_MESSAGE = "The appointment's time is now taken by another appointment for this employee."
+
+
+def _restored_slot(appointment, previous_details):
+    """(date, time, end_time) ``appointment`` gets back from a reschedule snapshot, as Python values."""
+    return tuple(
+        Appointment._meta.get_field(name).to_python(previous_details.get(name, getattr(appointment, name)))
+        for name in ("date", "time", "end_time")
+    )
+
+
+def _slot_conflicts(moves):
+    """
+    Keys of the ``moves`` — (key, appointment, (date, time, end_time)) — whose slot
+    overlaps another active booking or series occurrence of the employee, or a move
+    earlier in the list. A fixed number of queries however many there are.
+    """
+    if not moves:
+        return set()
+    days = [day for _, _, (day, _, _) in moves]
+    booked = booked_slots({appointment.employee_id for _, appointment, _ in moves}, min(days), max(days))
+
+    conflicts = set()
+    for key, appointment, (day, start, end) in moves:
+        slot = booked[(appointment.employee_id, day)]
+        if overlaps(slot, start, end, exclude=appointment.pk):
+            conflicts.add(key)
+        else:
+            slot.append((appointment.pk, start, end))
+    return conflicts
+
+
+def _revert_conflicts(notifications):
+    """Ids of the notifications whose decline would revert their appointment into a taken slot."""
+    return _slot_conflicts([
+        (notification.id, notification.appointment, _restored_slot(notification.appointment, notification.previous_details))
+        for notification in notifications if notification.appointment and notification.previous_details
+    ])
+
+
+def _reactivation_conflicts(notifications):
+    """
+    Ids of the notifications whose approval would bring a canceled or no-show appointment
+    back into a slot that was booked since. The overlap constraint skips inactive rows,
+    so nothing else stops that slot from being reused.
+    """
+    return _slot_conflicts([
+        (notification.id, notification.appointment, (notification.appointment.date,
+                                                      notification.appointment.time,
+                                                      notification.appointment.end_time))
+        for notification in notifications
+        if notification.appointment and notification.appointment.status in Appointment.INACTIVE_STATUSES
+    ])
+
+
+def _save_guarded(*instances):
+    """
+    Save ``instances`` in one savepoint. Returns False instead of raising when PostgreSQL's
+    overlap exclusion constraint rejects the write (a booking made after the check).
+    """
+    try:
+        with transaction.atomic():
+            for instance in instances:
+                if instance is not None:
+                    instance.save()
+    except IntegrityError as exc:
+        if Appointment.NO_OVERLAP_CONSTRAINT not in str(exc):
+            raise
+        return False
+    return True
+
+
+def _restore_previous_details(appointment, previous_details, services_by_name):
+    """
+    Revert an appointment in memory to a reschedule snapshot and confirm it; the caller saves.
+    ``services_by_name`` maps Service.name to Service for the snapshot's service lookup.
+    """
+    appointment.date, appointment.time, appointment.end_time = _restored_slot(appointment, previous_details)
+    appointment.price = Appointment._meta.get_field("price").to_python(previous_details.get("price", appointment.price))
+    # Look up the service by its name stored in previous_details
+    service_name = previous_details.get("service")
+    if service_name and service_name in services_by_name:
+        appointment.service = services_by_name[service_name]
+    appointment.notes = previous_details.get("notes", appointment.notes)
+    appointment.status = "confirmed"  # Revert to confirmed (or your desired default)
+    appointment.requires_approval = False
+
+
+def _apply_approval(notification, services_by_name=None):
+    """Approve a notification and confirm its appointment, in memory."""
+    if notification.appointment:
+        notification.appointment.status = "confirmed"
+        notification.appointment.requires_approval = False
+
+    # Clear the previous_details snapshot now that the appointment is confirmed.
+    notification.previous_details = None
+    notification.status = "approved"
+
+
+def _apply_decline(notification, services_by_name):
+    """
+    Deny a notification, in memory: reschedules revert to their previous details,
+    new appointments (no previous details) are canceled.
+    """
+    appointment = notification.appointment
+    if appointment:
+        if notification.previous_details:
+            _restore_previous_details(appointment, notification.previous_details, services_by_name)
+        else:
+            appointment.status = "canceled"
+            appointment.requires_approval = False
+    # Mark the notification as denied
+    notification.status = "denied"
+
+
+def _services_for(previous_details):
+    service_name = (previous_details or {}).get("service")
+    if not service_name:
+        return {}
+    return Service.objects.in_bulk([service_name], field_name="name")
 
 
 class ApproveNotificationView(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request, pk):
-        notification = get_object_or_404(Notifications, pk=pk)
-
-        if notification.appointment:
-            notification.appointment.status = "confirmed"
-            notification.appointment.requires_approval = False
-            notification.appointment.save()
+        notification = get_object_or_404(Notifications.objects.select_related("appointment"), pk=pk)
+        if _reactivation_conflicts([notification]):
+            return Response({"error": REACTIVATE_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
 
-        # Clear the previous_details snapshot now that the appointment is confirmed.
-        notification.previous_details = None
-        notification.status = "approved"
-        notification.save()
+        _apply_approval(notification)
+        if not _save_guarded(notification.appointment, notification):
+            return Response({"error": REACTIVATE_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
 
         return Response({"message": "Appointment approved successfully."}, status=200)
 
@@ -395,75 +1139,126 @@ class DeclineNotificationView(APIView):
     permission_classes = [IsAdminUser]
 
     def post(self, request, pk):
-        notification = get_object_or_404(Notifications, pk=pk)
-        if notification.appointment:
-            if notification.previous_details:
-                # Revert appointment to its previous details
-                appointment = notification.appointment
-                pd = notification.previous_details
-                appointment.date = pd.get("date", appointment.date)
-                appointment.time = pd.get("time", appointment.time)
-                appointment.end_time = pd.get("end_time", appointment.end_time)
-                appointment.price = pd.get("price", appointment.price)
-                # Look up the service by its name stored in previous_details
-                service_name = pd.get("service")
-                if service_name:
-                    service_obj = Service.objects.filter(name=service_name).first()
-                    if service_obj:
-                        appointment.service = service_obj
-                appointment.notes = pd.get("notes", appointment.notes)
-                appointment.status = "confirmed"  # Revert to confirmed (or your desired default)
-                appointment.requires_approval = False
-                appointment.save()
-            else:
-                # For new appointments (with no previous details), cancel the appointment
-                appointment = notification.appointment
-                appointment.status = "canceled"
-                appointment.requires_approval = False
-                appointment.save()
-        # Mark the notification as denied
-        notification.status = "denied"
-        notification.save()
+        notification = get_object_or_404(Notifications.objects.select_related("appointment"), pk=pk)
+        if _revert_conflicts([notification]):
+            return Response({"error": REVERT_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
+
+        _apply_decline(notification, _services_for(notification.previous_details))
+        if not _save_guarded(notification.appointment, notification):
+            return Response({"error": REVERT_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
 
         return Response({"message": "Appointment request denied."}, status=200)
 
+
+class BulkNotificationActionView(APIView):
+    """
+    Approves or declines many notifications at once.
+
+    POST {"ids": [...], "action": "approve" | "decline"}. The batch runs in one
+    transaction: notifications and their appointments are locked with
+    SELECT ... FOR UPDATE, changed in memory and written back with bulk_update.
+    Returns one result per requested id.
+    """
+    permission_classes = [IsAdminUser]
+    actions = {"approve": _apply_approval, "decline": _apply_decline}
+    conflict_checks = {"approve": _reactivation_conflicts, "decline": _revert_conflicts}
+    conflict_messages = {"approve": REACTIVATE_CONFLICT_MESSAGE, "decline": REVERT_CONFLICT_MESSAGE}
+    max_batch_size = 1000
+    appointment_fields = [
+        "date", "time", "end_time", "price", "service", "notes", "status", "requires_approval", "updated_at",
+    ]
+
+    def post(self, request):
+        action = request.data.get("action")
+        ids = request.data.get("ids")
+
+        if action not in self.actions:
+            raise ValidationError({"action": "Action must be 'approve' or 'decline'."})
+        if not isinstance(ids, list) or not ids or not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError({"ids": "Provide a non-empty list of notification ids."})
+        if len(ids) > self.max_batch_size:
+            raise ValidationError({"ids": f"At most {self.max_batch_size} notifications per request."})
+
+        apply = self.actions[action]
+        try:
+            with transaction.atomic():
+                notifications = list(Notifications.objects.select_for_update().filter(id__in=ids).order_by("id"))
+                appointments = Appointment.objects.select_for_update().in_bulk(
+                    [n.appointment_id for n in notifications if n.appointment_id]
+                )
+                for notification in notifications:
+                    if notification.appointment_id:
+                        notification.appointment = appointments[notification.appointment_id]
+                # Declines whose revert, or approvals whose reactivation, would double-book are
+                # left untouched and reported per id
+                conflicts = self.conflict_checks[action](notifications)
+                notifications = [n for n in notifications if n.id not in conflicts]
+                # Services are a handful of rows; one lookup map serves every revert in the batch
+                services_by_name = Service.objects.in_bulk(field_name="name") if action == "decline" else {}
+
+                # bulk_update skips auto_now, so stamp updated_at explicitly
+                stamp = now()
+                changed = {}
+                for notification in notifications:
+                    apply(notification, services_by_name)
+                    notification.updated_at = stamp
+                    if notification.appointment:
+                        notification.appointment.updated_at = stamp
+                        changed[notification.appointment.pk] = notification.appointment
+
+                Appointment.objects.bulk_update(changed.values(), self.appointment_fields)
+                sync_daily_revenue(changed.values())
+                Notifications.objects.bulk_update(notifications, ["status", "previous_details", "updated_at"])
+                # bulk_update sends no post_save, so push the batch to the stream here (after commit)
+                publish_notifications([n.id for n in notifications], "updated")
+        except IntegrityError as exc:
+            if Appointment.NO_OVERLAP_CONSTRAINT not in str(exc):
+                raise
+            # A booking made during the batch took a reverted slot; nothing was written
+            return Response({"error": self.conflict_messages[action]}, status=status.HTTP_409_CONFLICT)
+
+        processed = {n.id: n.status for n in notifications}
+
+        def result(pk):
+            if pk in processed:
+                return {"id": pk, "status": processed[pk]}
+            if pk in conflicts:
+                return {"id": pk, "error": self.conflict_messages[action]}
+            return {"id": pk, "error": "Not found."}
+
+        return Response({"results": [result(pk) for pk in ids]}, status=200)
+
+
 class DeleteNotificationView(APIView):
     permission_classes = [IsAdminUser]
 
     def delete(self, request, pk):
-        notification = get_object_or_404(Notifications, pk=pk)
+        notification = get_object_or_404(Notifications.objects.select_related("appointment"), pk=pk)
 
         # If it's a change request and has previous details, revert appointment
         if notification.action == "updated" and notification.previous_details:
+            if _revert_conflicts([notification]):
+                return Response({"error": REVERT_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
             appointment = notification.appointment
-            prev_details = notification.previous_details
-
-            # Restore previous values
-            appointment.date = prev_details.get("date", appointment.date)
-            appointment.time = prev_details.get("time", appointment.time)
-            appointment.end_time = prev_details.get("end_time", appointment.end_time)
-            appointment.price = prev_details.get("price", appointment.price)
-
-            # Restore service if it was changed
-            service_name = prev_details.get("service")
-            if service_name:
-                service_obj = Service.objects.filter(name=service_name).first()
-                if service_obj:
-                    appointment.service = service_obj
-
-            appointment.notes = prev_details.get("notes", appointment.notes)
-
-            # Reset status since the request is no longer valid
-            appointment.status = "confirmed"
-            appointment.requires_approval = False
-            appointment.save()
+            # Restore previous values and reset status since the request is no longer valid
+            _restore_previous_details(
+                appointment, notification.previous_details, _services_for(notification.previous_details)
+            )
+            if not _save_guarded(appointment):
+                return Response({"error": REVERT_CONFLICT_MESSAGE}, status=status.HTTP_409_CONFLICT)
 
         # Delete the notification
         notification.delete()
         return Response({"message": "Notification deleted successfully"}, status=204)
 
 class KeyMetrics(APIView):
+    """
+    Revenue and appointment totals come from the DailyRevenue rollup (one row per day,
+    employee and service). Distinct clients cannot be summed across days, so that count
+    still reads the appointments table.
+    """
     def get(self, request):
+        rollups = DailyRevenue.objects.all()
         queryset = Appointment.objects.filter(status="completed")
         range_param = request.query_params.get("range")
         month_param = request.query_params.get("month")
@@ -471,10 +1266,10 @@ class KeyMetrics(APIView):
         # Last 7 or 30 Days Range
         if range_param == "last_7_days":
             start = date.today() - timedelta(days=7)
-            queryset = queryset.filter(date__gte=start)
+            rollups, queryset = rollups.filter(date__gte=start), queryset.filter(date__gte=start)
         elif range_param == "last_30_days":
             start = date.today() - timedelta(days=30)
-            queryset = queryset.filter(date__gte=start)
+            rollups, queryset = rollups.filter(date__gte=start), queryset.filter(date__gte=start)
 
         # Specific Month Filter (e.g., 2025-04)
         elif month_param:
@@ -485,104 +1280,192 @@ class KeyMetrics(APIView):
                     end = date(year + 1, 1, 1) - timedelta(days=1)
                 else:
                     end = date(year, month + 1, 1) - timedelta(days=1)
-                queryset = queryset.filter(date__range=[start, end])
+                rollups, queryset = rollups.filter(date__range=[start, end]), queryset.filter(date__range=[start, end])
             except ValueError:
                 pass  # Invalid month format, fallback to no filter
 
         # Calculate metrics
-        total_rev = queryset.aggregate(total_revenue=Sum("price"))["total_revenue"]
-        total_appts = queryset.count()
+        totals = rollups.aggregate(total_revenue=Sum("revenue"), total_appointments=Sum("appointments"))
         total_clients = queryset.values("client").distinct().count()
 
         return Response({
-            "total_revenue": total_rev,
-            "total_appointments": total_appts,
+            "total_revenue": totals["total_revenue"],
+            "total_appointments": totals["total_appointments"] or 0,
             "clients_served": total_clients
         })
 
 
-class BillingSummaryView(APIView):
-    permission_classes = [IsAdminUser]
+class MetricsSeriesView(APIView):
+    """
+    Completed-appointment revenue, appointment count and distinct clients per day, week
+    or month between ``from`` and ``to``, optionally split by employee or service.
+    One grouped query; buckets without completed appointments are omitted.
+    """
+    buckets = {"day": F("date"), "week": TruncWeek("date"), "month": TruncMonth("date")}
+    groupings = {
+        "employee": ("employee", "employee__first_name", "employee__last_name"),
+        "service": ("service__name",),
+    }
+    max_window_days = 3 * 366
+
+    def get(self, request):
+        params = request.query_params
+        bucket = params.get("bucket", "day")
+        if bucket not in self.buckets:
+            raise ValidationError({"bucket": "Bucket must be 'day', 'week' or 'month'."})
+        group_by = params.get("group_by")
+        if group_by and group_by not in self.groupings:
+            raise ValidationError({"group_by": "Group by must be 'employee' or 'service'."})
+
+        end = _parse_date_param(params, "to") or date.today()
+        start = _parse_date_param(params, "from") or end - timedelta(days=29)
+        if end < start:
+            raise ValidationError({"to": "'to' must not be before 'from'."})
+        if (end - start).days >= self.max_window_days:
+            raise ValidationError({"to": f"Window may not exceed {self.max_window_days} days."})
+
+        group_fields = self.groupings[group_by] if group_by else ()
+        rows = (
+            Appointment.objects.filter(status="completed", date__range=[start, end])
+            .annotate(period=self.buckets[bucket])
+            .values("period", *group_fields)
+            .annotate(
+                revenue=Sum("price"),
+                appointments=Count("id"),
+                clients_served=Count("client", distinct=True),
+            )
+            .order_by("period", *group_fields)
+        )
+
+        series = []
+        for row in rows:
+            point = {"period": row["period"]}
+            if group_by == "employee":
+                point["employee"] = row["employee"]
+                point["employee_name"] = f"{row['employee__first_name']} {row['employee__last_name']}".strip()
+            elif group_by == "service":
+                point["service"] = row["service__name"]
+            point.update(
+                revenue=row["revenue"], appointments=row["appointments"], clients_served=row["clients_served"]
+            )
+            series.append(point)
+
+        return Response({"bucket": bucket, "from": start, "to": end, "group_by": group_by, "series": series})
 
-    def post(self, request):
-        # Extract user-provided inputs
-        start_date = request.data.get("start_date")
-        end_date = request.data.get("end_date")
-        month = request.data.get("month")
-        year = request.data.get("year")
-        fee_type = request.data.get("fee_type")
-        fee_value = request.data.get("fee_value")
-
-        # Validate fee input
-        if not fee_type or fee_value is None:
-            return Response({"error": "Missing fee_type or fee_value."}, status=400)
 
+def _resolve_billing_params(params):
+    """
+    Validate the fee inputs and resolve the billing date range from request params.
+    Raises ValidationError({"error": ...}) on bad input.
+    """
+    # Extract user-provided inputs; dates are parsed so they are safe to use in filters and filenames
+    start_date = _parse_date_param(params, "start_date")
+    end_date = _parse_date_param(params, "end_date")
+    month = params.get("month")
+    year = params.get("year")
+    fee_type = params.get("fee_type")
+    fee_value = params.get("fee_value")
+
+    # Validate fee input
+    if not fee_type or fee_value is None:
+        raise ValidationError({"error": "Missing fee_type or fee_value."})
+
+    try:
+        fee_value = Decimal(str(fee_value))
+    except Exception:
+        raise ValidationError({"error": "Fee value must be numeric."})
+
+    # Resolve date range
+    if month and year:
         try:
-            fee_value = Decimal(str(fee_value))
-        except Exception:
-            return Response({"error": "Fee value must be numeric."}, status=400)
+            month = int(month)
+            year = int(year)
+            start_date = date(year, month, 1)
+            if month == 12:
+                end_date = date(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                end_date = date(year, month + 1, 1) - timedelta(days=1)
+        except ValueError:
+            raise ValidationError({"error": "Invalid month or year provided."})
+    elif not start_date or not end_date:
+        today = date.today()
+        start_date = date(today.year, today.month, 1)
+        end_date = today
+    elif end_date < start_date:
+        raise ValidationError({"error": "end_date must not be before start_date."})
+
+    return start_date, end_date, fee_type, fee_value
+
+
+def _resolve_export_format(request):
+    export_format = request.query_params.get("export_format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError({"error": f"export_format must be one of: {', '.join(EXPORT_FORMATS)}."})
+    return export_format
 
-        # Resolve date range
-        if month and year:
-            try:
-                month = int(month)
-                year = int(year)
-                start_date = date(year, month, 1)
-                if month == 12:
-                    end_date = date(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_date = date(year, month + 1, 1) - timedelta(days=1)
-            except ValueError:
-                return Response({"error": "Invalid month or year provided."}, status=400)
-        elif not start_date or not end_date:
-            today = date.today()
-            start_date = date(today.year, today.month, 1)
-            end_date = today
+
+class BillingSummaryView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        start_date, end_date, fee_type, fee_value = _resolve_billing_params(request.data)
 
         # Query appointments
         queryset = Appointment.objects.filter(status="completed", date__range=[start_date, end_date])
-        shop_total_revenue = queryset.aggregate(Sum("price"))['price__sum'] or Decimal('0')
-        shop_total_appointments = queryset.count()
-        shop_total_earnings = Decimal('0')  # Track total shop earnings
+        percentage = fee_value / Decimal('100')
+
+        # Per-employee totals in one GROUP BY
+        totals = queryset.values("employee").annotate(total=Sum("price"), count=Count("id")).order_by("employee")
 
         report_data = []
-        employee_ids = queryset.values_list("employee", flat=True).distinct()
+        employees = {}
+        shop_total_revenue = Decimal('0')
+        shop_total_appointments = 0
+        shop_total_earnings = Decimal('0')  # Track total shop earnings
 
-        for employee_id in employee_ids:
-            employee_appts = queryset.filter(employee__id=employee_id)
-            employee_total = employee_appts.aggregate(Sum("price"))['price__sum'] or Decimal('0')
+        for row in totals:
+            employee_total = row["total"] or Decimal('0')
 
             if fee_type == "flat":
-                fee_amount = fee_value * employee_appts.count()
+                fee_amount = fee_value * row["count"]
             elif fee_type == "percentage":
-                fee_amount = employee_total * (fee_value / Decimal('100'))
+                fee_amount = employee_total * percentage
             else:
                 fee_amount = Decimal('0')
 
+            shop_total_revenue += employee_total
+            shop_total_appointments += row["count"]
             shop_total_earnings += fee_amount  # Add to shop earnings total
 
-            total_employee_revenue = employee_total - fee_amount
-
             employee_data = {
-                "employee_id": employee_id,
+                "employee_id": row["employee"],
                 "total_earned": float(employee_total),
                 "shop_fee": float(fee_amount),
-                "net_payout": float(total_employee_revenue),
-                "total_appointments": employee_appts.count(),
-                "appointments": [
-                    {
-                        "client_name": f"{appt.client.first_name} {appt.client.last_name}",
-                        "date": appt.date.strftime("%Y-%m-%d"),
-                        "price": float(appt.price),
-                        "shop_cut": float(fee_value) if fee_type == "flat" else float(appt.price * (fee_value / Decimal('100'))),
-                        "artist_cut": float(appt.price - (fee_value if fee_type == "flat" else appt.price * (fee_value / Decimal('100')))),
-                    }
-                    for appt in employee_appts.order_by("date")
-                ]
+                "net_payout": float(employee_total - fee_amount),
+                "total_appointments": row["count"],
+                "appointments": [],
             }
-
+            employees[row["employee"]] = employee_data
             report_data.append(employee_data)
 
+        # Appointment detail for every employee in one ordered pass over a flat projection
+        details = queryset.order_by("employee", "date", "id").values_list(
+            "employee", "date", "price", "client__first_name", "client__last_name"
+        )
+        for employee_id, appt_date, price, first_name, last_name in details:
+            employee_data = employees.get(employee_id)
+            if employee_data is None:
+                # Completed after the totals query ran; it belongs to the next report, not this one
+                continue
+            shop_cut = fee_value if fee_type == "flat" else price * percentage
+            employee_data["appointments"].append({
+                "client_name": f"{first_name} {last_name}",
+                "date": appt_date.strftime("%Y-%m-%d"),
+                "price": float(price),
+                "shop_cut": float(shop_cut),
+                "artist_cut": float(price - shop_cut),
+            })
+
         # Return the full report with added earnings
         return Response({
             "shop_total_revenue": float(shop_total_revenue),
@@ -590,3 +1473,41 @@ class BillingSummaryView(APIView):
             "shop_total_earnings": float(shop_total_earnings),
             "report": report_data
         })
+
+
+class BillingExportView(APIView):
+    """
+    Streams one row per completed appointment in the billing period, with the
+    shop/artist split, as CSV or NDJSON (?export_format=).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        start_date, end_date, fee_type, fee_value = _resolve_billing_params(request.query_params)
+        export_format = _resolve_export_format(request)
+        percentage = fee_value / Decimal('100')
+
+        queryset = (
+            Appointment.objects.filter(status="completed", date__range=[start_date, end_date])
+            .order_by("employee", "date", "id")
+            .values_list(
+                "id", "employee", "employee__first_name", "employee__last_name",
+                "client__first_name", "client__last_name", "date", "price",
+            )
+        )
+
+        def rows():
+            for appt_id, employee_id, emp_first, emp_last, first_name, last_name, appt_date, price in (
+                queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            ):
+                shop_cut = fee_value if fee_type == "flat" else price * percentage
+                yield (
+                    appt_id, employee_id, f"{emp_first} {emp_last}".strip(), f"{first_name} {last_name}",
+                    appt_date, price, shop_cut, price - shop_cut,
+                )
+
+        header = (
+            "appointment_id", "employee_id", "employee_name", "client_name",
+            "date", "price", "shop_cut", "artist_cut",
+        )
+        return streaming_export(header, rows(), export_format, f"billing_{start_date}_{end_date}")
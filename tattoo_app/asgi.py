@@ -2,6 +2,9 @@
 ASGI config for tattoo_app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn tattoo_app.asgi:application``) so the
+long-lived Server-Sent Events stream at /recent-activity/stream/ is handled without
+tying up a worker thread per connected client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tattoo_app.settings')
 
 application = get_asgi_application()
+
+# Build the client typeahead index before the first request (see core.client_index)
+from core.client_index import warm_client_index  # noqa: E402
+
+warm_client_index()
@@ -120,6 +120,20 @@ DATABASES = {
     }
 }
 
+# Shared cache. Required: the service catalog and the client search index keep
+# per-process copies and tell other workers to reload them through version keys
+# stored here, so every worker must see the same cache. Requests are served from
+# the per-process copies and only check these keys every few seconds, so the
+# database backend costs little. Its table is created by migration 0028 (running
+# `createcachetable` again is harmless). Any other shared backend (e.g. Redis)
+# works too, but a per-process one such as LocMemCache does not.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'core_cache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -151,6 +165,23 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Shop hours used when searching for open appointment slots
+SHOP_OPENING_TIME = "10:00"
+SHOP_CLOSING_TIME = "20:00"
+
+# Notification retention
+NOTIFICATION_RETENTION_DAYS = 30
+# Seconds between in-process prune runs; None disables the scheduler (use `manage.py prune_notifications`)
+NOTIFICATION_PRUNE_INTERVAL = None
+# Days /appointments/changes/ remembers deletions; older sync tokens are refused. Pruned with notifications
+APPOINTMENT_TOMBSTONE_RETENTION_DAYS = 30
+
+# Pub/sub backend for the notification event stream (/recent-activity/stream/). The
+# stream needs an ASGI server (it returns 501 under WSGI/runserver). InProcessBroker only
+# reaches subscribers in the worker process that made the change, so it requires a
+# single ASGI worker process; scale out with a core.events.BaseBroker shared between workers.
+NOTIFICATION_BROKER = "core.events.InProcessBroker"
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tattoo_app.settings')
 
 application = get_wsgi_application()
+
+# Build the client typeahead index before the first request (see core.client_index)
+from core.client_index import warm_client_index  # noqa: E402
+
+warm_client_index()